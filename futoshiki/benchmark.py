@@ -0,0 +1,258 @@
+import argparse
+import gc
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from futoshiki.core import Puzzle, check_solution, generate_puzzle, generate_solved_board
+from futoshiki.core.generator import DIFFICULTY_SETTINGS, new_puzzle
+from futoshiki.core.rating import SCORE_MEDIANS, rate_puzzle
+from futoshiki.core.solver import FutoshikiSolver
+
+# Reproducible timings of the core operations. Generation runs from fixed
+# seeds; solving, uniqueness checks, rating and validation run over a
+# committed corpus of hard reference puzzles (rebuild it with the 'corpus'
+# command only on purpose, since results are only comparable on the same
+# corpus). Every operation is timed per call for latency percentiles and
+# throughput, then run once more under tracemalloc for its peak memory.
+#
+#   python -m futoshiki.benchmark run --json results.json
+#   python -m futoshiki.benchmark run --baseline results.json --threshold 0.2
+#
+# The 'bands' command measures the median rating of generated puzzles per
+# size and difficulty, printed in the form of core.rating.SCORE_MEDIANS.
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'benchmark_corpus.jsonl')
+CORPUS_SEED = 20240601
+CORPUS_PER_SIZE = 3
+SIZES = list(range(3, 16))
+RUN_SEED = 1234
+
+# Calls per operation and size; big grids get fewer so a run stays short
+DEFAULT_REPEAT = 50
+
+
+def repeat_for(size, repeat):
+    return max(3, repeat * 5 // size) if size > 5 else repeat
+
+
+def build_corpus(path, sizes, per_size, seed):
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        for size in sizes:
+            rng = random.Random(f"{seed}:{size}")
+            # The hardest of a few candidates, by rating
+            candidates = []
+            for _ in range(per_size * 2):
+                solution = generate_solved_board(size, rng=rng)
+                puzzle, inequalities = generate_puzzle(solution, 'hard', rng)
+                rating = rate_puzzle(puzzle, inequalities).score
+                candidates.append(Puzzle(size, 'hard', puzzle, inequalities, solution, rating))
+            candidates.sort(key=lambda puzzle: -puzzle.rating)
+            for puzzle in candidates[:per_size]:
+                f.write(json.dumps(puzzle.to_dict(), ensure_ascii=False) + '\n')
+            print(f"{size}x{size}: ratings {[puzzle.rating for puzzle in candidates[:per_size]]}")
+
+
+def load_corpus(path):
+    corpus = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            puzzle = Puzzle.from_dict(json.loads(line))
+            corpus.setdefault(puzzle.size, []).append(puzzle)
+    return corpus
+
+
+def operations(corpus, seed):
+    # name -> function(size) returning a callable for one timed call
+    def solved_board(size):
+        rng = random.Random(f"{seed}:board:{size}")
+        return lambda: generate_solved_board(size, rng=rng)
+
+    def carve(size):
+        rng = random.Random(f"{seed}:puzzle:{size}")
+        boards = [generate_solved_board(size, rng=rng) for _ in range(4)]
+        count = iter(range(1 << 30))
+        return lambda: generate_puzzle(boards[next(count) % len(boards)], 'medium', rng)
+
+    def over_corpus(action):
+        def make(size):
+            puzzles = corpus.get(size)
+            if not puzzles:
+                return None
+            count = iter(range(1 << 30))
+            return lambda: action(puzzles[next(count) % len(puzzles)])
+        return make
+
+    def validate_batch(size):
+        # 1000 boards per call through the NumPy validator
+        from futoshiki.core import batch
+        puzzles = corpus.get(size)
+        if not puzzles:
+            return None
+        boards = batch.np.array([puzzles[number % len(puzzles)].solution for number in range(1000)])
+        encoded = batch.np.stack([batch.encode_inequalities(puzzles[number % len(puzzles)].inequalities, size)
+                                  for number in range(1000)])
+        return lambda: batch.validate_boards(boards, encoded)
+
+    makers = {
+        'generate_solved_board': solved_board,
+        'generate_puzzle': carve,
+        'solve': over_corpus(lambda p: FutoshikiSolver(p.size, p.inequalities).solve(p.puzzle)),
+        'count_solutions': over_corpus(lambda p: FutoshikiSolver(p.size, p.inequalities).count_solutions(p.puzzle)),
+        'rate_puzzle': over_corpus(lambda p: rate_puzzle(p.puzzle, p.inequalities)),
+        'check_solution': over_corpus(lambda p: check_solution(p.solution, p.inequalities)),
+    }
+    if importlib.util.find_spec('numpy') is not None:
+        makers['validate_boards_x1000'] = validate_batch
+    return makers
+
+
+def percentile(ordered, fraction):
+    # Nearest-rank percentile of an already sorted list
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def measure(call, repeat):
+    call()  # warm-up: caches, first allocations
+    gc.collect()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(samples)
+    return {
+        'samples': len(samples),
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'p99_ms': percentile(samples, 0.99) * 1000,
+        'mean_ms': total / len(samples) * 1000,
+        'ops_per_sec': len(samples) / total if total else float('inf'),
+        'peak_kib': peak / 1024,
+    }
+
+
+def run(names, sizes, repeat, seed, corpus, out):
+    results = {}
+    makers = operations(corpus, seed)
+    print(f"{'operation':<22} {'size':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/sec':>10} {'peak KiB':>9}",
+          file=out)
+    for name in names:
+        for size in sizes:
+            call = makers[name](size)
+            if call is None:
+                continue
+            result = measure(call, repeat_for(size, repeat))
+            results[f"{name}/{size}"] = result
+            print(f"{name:<22} {size:>4} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+                  f"{result['ops_per_sec']:>10.1f} {result['peak_kib']:>9.1f}", file=out)
+    return results
+
+
+def compare(results, baseline, threshold, metric='p50_ms'):
+    # Keys whose metric got slower than the baseline by more than threshold
+    regressions = []
+    for key, result in sorted(results.items()):
+        before = baseline.get(key)
+        if before is None or not before[metric]:
+            continue
+        change = result[metric] / before[metric] - 1
+        if change > threshold:
+            regressions.append((key, before[metric], result[metric], change))
+    return regressions
+
+
+def score_medians(sizes, samples, seed):
+    # {size: (easy, medium, hard)} median generated score
+    medians = {}
+    for size in sizes:
+        row = []
+        for difficulty in DIFFICULTY_SETTINGS:
+            rng = random.Random(f"{seed}:{size}:{difficulty}")
+            row.append(int(statistics.median(new_puzzle(size, difficulty, rng).rating for _ in range(samples))))
+        medians[size] = tuple(row)
+        print(f"    {size}: {medians[size]},", flush=True)
+    return medians
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="futoshiki-benchmark", description="Time generation, solving and validation.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    command = subparsers.add_parser('run', help="run the benchmarks")
+    command.add_argument('--operations', nargs='+', choices=list(operations({}, 0)), default=list(operations({}, 0)))
+    command.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    command.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="timed calls per operation on small grids")
+    command.add_argument('--seed', type=int, default=RUN_SEED)
+    command.add_argument('--corpus', default=CORPUS_PATH)
+    command.add_argument('--json', help="write results to this file ('-' for stdout)")
+    command.add_argument('--baseline', help="results file to compare against")
+    command.add_argument('--threshold', type=float, default=0.2, help="allowed p50 slowdown, e.g. 0.2 for 20%%")
+
+    command = subparsers.add_parser('corpus', help="rebuild the reference corpus")
+    command.add_argument('--path', default=CORPUS_PATH)
+    command.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    command.add_argument('--per-size', type=int, default=CORPUS_PER_SIZE)
+    command.add_argument('--seed', type=int, default=CORPUS_SEED)
+
+    command = subparsers.add_parser('bands', help="measure SCORE_MEDIANS for the rating bands")
+    command.add_argument('--sizes', type=int, nargs='+', default=list(SCORE_MEDIANS))
+    command.add_argument('--samples', type=int, default=40, help="puzzles per size and difficulty")
+    command.add_argument('--seed', default="calibrate")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'bands':
+        score_medians(args.sizes, args.samples, args.seed)
+        return 0
+    if args.command == 'corpus':
+        build_corpus(args.path, args.sizes, args.per_size, args.seed)
+        return 0
+
+    report = sys.stderr if args.json == '-' else sys.stdout
+    corpus = load_corpus(args.corpus)
+    results = run(args.operations, args.sizes, args.repeat, args.seed, corpus, report)
+    document = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'corpus': os.path.basename(args.corpus),
+        },
+        'results': results,
+    }
+    if args.json == '-':
+        json.dump(document, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for key, before, after, change in regressions:
+            print(f"REGRESSION {key}: p50 {before:.3f} ms -> {after:.3f} ms (+{change:.0%})", file=report)
+        print(f"{len(regressions)} regressions over {args.threshold:.0%} against {args.baseline}", file=report)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+# Headless puzzle logic: nothing in this package may import tkinter, PIL or
+# pygame, so it can be used from servers, batch jobs and benchmarks.
+from .board import Puzzle, check_solution, copy_board, empty_board
+from .constraints import FLIPPED_SIGNS, all_inequalities, inequality_sign, relation, satisfies
+from .generator import DIFFICULTY_SETTINGS, generate_puzzle, new_puzzle
+from .rating import SCORE_MEDIANS, PuzzleRater, Rating, band_distance, rate_puzzle, rating_band, rating_bands
+from .seeds import PuzzleCache, duel_code, parse_duel_code, puzzle_cache, random_seed, seeded_puzzle
+from .solver import FutoshikiSolver, SearchLimitExceeded, count_solutions, generate_solved_board, solve
@@ -0,0 +1,354 @@
+import argparse
+import bisect
+import mmap
+import os
+import random
+import struct
+import sys
+
+from .board import Puzzle, check_solution
+from .constraints import adjacent_pairs, inequality_sign
+from .generator import DIFFICULTY_SETTINGS, new_puzzle
+from .solver import FutoshikiSolver
+
+# A bank is a directory with one section per (size, difficulty):
+#
+#   <size>x<size>-<difficulty>.bank   12-byte header, then fixed-size records
+#   <size>x<size>-<difficulty>.idx    (rating, record number) pairs sorted by rating
+#
+# A record packs the givens and the solution one cell per nibble, then two
+# bitfields over the adjacent pairs of the grid (in adjacent_pairs order): one
+# bit saying whether the pair has an inequality and one saying whether the
+# first cell is the greater one, followed by the rating as a uint16 (the
+# core.rating score; version 1 banks stored raw search node counts and
+# version 2 banks an earlier scale that added a hundred per node). Fixed-size
+# records let a puzzle be read from the mmap at any offset without parsing
+# the rest of the file.
+
+MAGIC = b'FTSK'
+VERSION = 3
+HEADER = struct.Struct('<4sBBBxI')
+INDEX_ENTRY = struct.Struct('<HI')
+RATING = struct.Struct('<H')
+DIFFICULTIES = list(DIFFICULTY_SETTINGS)
+MAX_SIZE = 15
+
+
+def nibble_bytes(size):
+    return (size * size + 1) // 2
+
+
+def bitfield_bytes(size):
+    return (2 * size * (size - 1) + 7) // 8
+
+
+def record_size(size):
+    return 2 * nibble_bytes(size) + 2 * bitfield_bytes(size) + RATING.size
+
+
+def pack_nibbles(board):
+    values = [value for row in board for value in row]
+    if len(values) % 2:
+        values.append(0)
+    return bytes(values[i] << 4 | values[i + 1] for i in range(0, len(values), 2))
+
+
+def unpack_nibbles(data, size):
+    values = []
+    for byte in data:
+        values.append(byte >> 4)
+        values.append(byte & 0x0F)
+    return [values[row * size:(row + 1) * size] for row in range(size)]
+
+
+def encode_puzzle(puzzle):
+    if puzzle.size > MAX_SIZE:
+        raise ValueError(f"Puzzles larger than {MAX_SIZE}x{MAX_SIZE} do not fit in a nibble per cell.")
+    present = 0
+    greater = 0
+    for bit, pair in enumerate(adjacent_pairs(puzzle.size)):
+        sign = puzzle.inequalities.get(pair)
+        if sign is not None:
+            present |= 1 << bit
+            if sign in ('>', 'v'):
+                greater |= 1 << bit
+    width = bitfield_bytes(puzzle.size)
+    return (pack_nibbles(puzzle.puzzle) + pack_nibbles(puzzle.solution)
+            + present.to_bytes(width, 'little') + greater.to_bytes(width, 'little')
+            + RATING.pack(min(puzzle.rating or 0, 0xFFFF)))
+
+
+def decode_puzzle(data, size, difficulty):
+    cells = nibble_bytes(size)
+    width = bitfield_bytes(size)
+    puzzle = unpack_nibbles(data[:cells], size)
+    solution = unpack_nibbles(data[cells:2 * cells], size)
+    offset = 2 * cells
+    present = int.from_bytes(data[offset:offset + width], 'little')
+    greater = int.from_bytes(data[offset + width:offset + 2 * width], 'little')
+    (rating,) = RATING.unpack_from(data, offset + 2 * width)
+
+    inequalities = {}
+    for bit, pair in enumerate(adjacent_pairs(size)):
+        if present >> bit & 1:
+            horizontal = pair[0][0] == pair[1][0]
+            if greater >> bit & 1:
+                inequalities[pair] = '>' if horizontal else 'v'
+            else:
+                inequalities[pair] = '<' if horizontal else 'ʌ'
+    return Puzzle(size, difficulty, puzzle, inequalities, solution, rating)
+
+
+class IndexRatings:
+    # Read-only sequence view of the ratings in an mmapped index, so bisect
+    # can search it without loading the index into memory
+
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index) // INDEX_ENTRY.size
+
+    def __getitem__(self, position):
+        return INDEX_ENTRY.unpack_from(self.index, position * INDEX_ENTRY.size)[0]
+
+
+class BankSection:
+    def __init__(self, path, size, difficulty):
+        self.path = path
+        self.size = size
+        self.difficulty = difficulty
+        self.record_size = record_size(size)
+        self.data = None
+        self.index = None
+        self.ratings = []
+        self.count = 0
+        self.load()
+
+    def load(self):
+        self.close()
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= HEADER.size:
+            return
+        with open(self.path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, size, difficulty, width = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} puzzle bank.")
+        if size != self.size or DIFFICULTIES[difficulty] != self.difficulty or width != self.record_size:
+            raise ValueError(f"{self.path} does not hold {self.size}x{self.size} {self.difficulty} puzzles.")
+        self.count = (len(self.data) - HEADER.size) // self.record_size
+
+        index_path = os.path.splitext(self.path)[0] + '.idx'
+        if os.path.exists(index_path) and os.path.getsize(index_path) == self.count * INDEX_ENTRY.size:
+            if self.count:
+                with open(index_path, 'rb') as f:
+                    self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self.ratings = IndexRatings(self.index)
+
+    def close(self):
+        for mapped in (self.data, self.index):
+            if mapped is not None:
+                mapped.close()
+        self.data = None
+        self.index = None
+        self.ratings = []
+        self.count = 0
+
+    def record(self, number):
+        if not 0 <= number < self.count:
+            raise IndexError(f"Record {number} out of range for {self.path}.")
+        offset = HEADER.size + number * self.record_size
+        return self.data[offset:offset + self.record_size]
+
+    def get(self, number):
+        return decode_puzzle(self.record(number), self.size, self.difficulty)
+
+    def rating_range(self, low, high):
+        # Positions in the index whose rating lies in [low, high]
+        return bisect.bisect_left(self.ratings, low), bisect.bisect_right(self.ratings, high)
+
+    def random(self, rng=random, rating=None):
+        if rating is None:
+            return self.get(rng.randrange(self.count))
+        if self.index is None:
+            raise ValueError(f"{self.path} has no rating index; run 'index' first.")
+        start, stop = self.rating_range(*rating)
+        if start >= stop:
+            return None
+        _, number = INDEX_ENTRY.unpack_from(self.index, rng.randrange(start, stop) * INDEX_ENTRY.size)
+        return self.get(number)
+
+    def append(self, puzzles):
+        new_file = not os.path.exists(self.path)
+        self.close()
+        added = 0
+        with open(self.path, 'ab') as f:
+            if new_file:
+                f.write(HEADER.pack(MAGIC, VERSION, self.size, DIFFICULTIES.index(self.difficulty), self.record_size))
+            for puzzle in puzzles:
+                f.write(encode_puzzle(puzzle))
+                added += 1
+        self.load()
+        return added
+
+    def build_index(self):
+        entries = []
+        for number in range(self.count):
+            offset = HEADER.size + (number + 1) * self.record_size - RATING.size
+            entries.append((RATING.unpack_from(self.data, offset)[0], number))
+        entries.sort()
+        index_path = os.path.splitext(self.path)[0] + '.idx'
+        tmp_path = index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(INDEX_ENTRY.pack(*entry) for entry in entries))
+        os.replace(tmp_path, index_path)
+        self.load()
+
+
+class PuzzleBank:
+    def __init__(self, directory):
+        self.directory = directory
+        self.sections = {}
+
+    def section(self, size, difficulty):
+        key = (size, difficulty)
+        if key not in self.sections:
+            path = os.path.join(self.directory, f"{size}x{size}-{difficulty}.bank")
+            self.sections[key] = BankSection(path, size, difficulty)
+        return self.sections[key]
+
+    def count(self, size, difficulty):
+        return self.section(size, difficulty).count
+
+    def get(self, size, difficulty, number):
+        return self.section(size, difficulty).get(number)
+
+    def random(self, size, difficulty, rng=random, rating=None):
+        section = self.section(size, difficulty)
+        if not section.count:
+            return None
+        return section.random(rng, rating)
+
+    def append(self, puzzles, index=True):
+        # Puzzles may be of mixed size and difficulty; returns how many were added
+        grouped = {}
+        for puzzle in puzzles:
+            grouped.setdefault((puzzle.size, puzzle.difficulty), []).append(puzzle)
+        added = 0
+        for key, group in grouped.items():
+            section = self.section(*key)
+            added += section.append(group)
+            if index:
+                section.build_index()
+        return added
+
+    def existing_sections(self):
+        if not os.path.isdir(self.directory):
+            return []
+        keys = []
+        for name in sorted(os.listdir(self.directory)):
+            stem, ext = os.path.splitext(name)
+            if ext == '.bank':
+                dims, difficulty = stem.split('-', 1)
+                keys.append((int(dims.split('x')[0]), difficulty))
+        return [self.section(*key) for key in keys]
+
+    def close(self):
+        for section in self.sections.values():
+            section.close()
+        self.sections = {}
+
+
+def verify_section(section, unique=True):
+    # Returns a list of error strings, empty when every record checks out
+    errors = []
+    if section.index is None:
+        errors.append(f"{section.path}: missing or stale rating index")
+    else:
+        numbers = set()
+        previous = -1
+        for position, (rating, number) in enumerate(INDEX_ENTRY.iter_unpack(section.index)):
+            if rating < previous:
+                errors.append(f"{section.path}: index not sorted at entry {position}")
+                break
+            previous = rating
+            numbers.add(number)
+        if len(numbers) != section.count:
+            errors.append(f"{section.path}: index does not cover every record")
+    for number in range(section.count):
+        puzzle = section.get(number)
+        try:
+            check_solution(puzzle.solution, puzzle.inequalities)
+        except ValueError as e:
+            errors.append(f"{section.path} record {number}: {e}")
+            continue
+        if not puzzle.is_solved_by(puzzle.solution):
+            errors.append(f"{section.path} record {number}: givens do not match the solution")
+        for pair, sign in puzzle.inequalities.items():
+            if inequality_sign(puzzle.solution, *pair) != sign:
+                errors.append(f"{section.path} record {number}: sign at {pair} contradicts the solution")
+        if unique and FutoshikiSolver(puzzle.size, puzzle.inequalities).count_solutions(puzzle.puzzle) != 1:
+            errors.append(f"{section.path} record {number}: solution is not unique")
+    return errors
+
+
+def generate_for_bank(size, difficulty, count, rng, solutions=None):
+    for number in range(count):
+        yield new_puzzle(size, difficulty, rng, solutions[number] if solutions is not None else None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="futoshiki-bank", description="Build, extend and verify a Futoshiki puzzle bank.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    for name, help_text in (('build', "create sections from scratch"), ('append', "add puzzles to existing sections")):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('bank', help="bank directory")
+        command.add_argument('--sizes', type=int, nargs='+', default=list(range(3, 9)))
+        command.add_argument('--difficulties', nargs='+', choices=DIFFICULTIES, default=DIFFICULTIES)
+        command.add_argument('--count', type=int, default=100, help="puzzles per size and difficulty")
+        command.add_argument('--seed', type=int, default=None)
+
+    command = subparsers.add_parser('index', help="rebuild the rating indexes")
+    command.add_argument('bank')
+
+    command = subparsers.add_parser('verify', help="check every record and index")
+    command.add_argument('bank')
+    command.add_argument('--skip-uniqueness', action='store_true', help="skip the (slow) unique-solution check")
+
+    args = parser.parse_args(argv)
+    bank = PuzzleBank(args.bank)
+
+    if args.command in ('build', 'append'):
+        os.makedirs(args.bank, exist_ok=True)
+        rng = random.Random(args.seed)
+        for size in args.sizes:
+            for difficulty in args.difficulties:
+                section = bank.section(size, difficulty)
+                if args.command == 'build' and section.count:
+                    section.close()
+                    os.remove(section.path)
+                    section.load()
+                section.append(generate_for_bank(size, difficulty, args.count, rng))
+                section.build_index()
+                print(f"{size}x{size} {difficulty}: {section.count} puzzles")
+    elif args.command == 'index':
+        for section in bank.existing_sections():
+            section.build_index()
+            print(f"{section.path}: indexed {section.count} puzzles")
+    elif args.command == 'verify':
+        failed = False
+        for section in bank.existing_sections():
+            errors = verify_section(section, unique=not args.skip_uniqueness)
+            for error in errors:
+                print(error)
+            failed = failed or bool(errors)
+            print(f"{section.path}: {section.count} puzzles, {'FAILED' if errors else 'ok'}")
+        bank.close()
+        return 1 if failed else 0
+    bank.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
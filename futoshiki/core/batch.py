@@ -0,0 +1,174 @@
+import numpy as np
+
+from .constraints import LESS, adjacent_pairs, relation
+
+# Whole-array versions of the board checks for servers that receive many
+# grids at once. Needs NumPy, which the game itself does not, so this module
+# is not imported by futoshiki.core.
+#
+# Boards are an (N, n, n) integer array. Inequalities are encoded per board as
+# an (N, P) int8 array over the P = 2n(n - 1) adjacent pairs in adjacent_pairs
+# order (the same order the bank uses): 0 for no sign, 1 if the first cell is
+# the smaller one, -1 if it is the greater one. A single (P,) row is shared by
+# every board, e.g. when all of them answer the same puzzle.
+
+VALID = 0
+INCOMPLETE = 1
+OUT_OF_RANGE = 2
+DUPLICATE = 3
+INEQUALITY = 4
+GIVEN_CHANGED = 5
+
+# Same messages as check_solution; GIVEN_CHANGED has no counterpart there
+MESSAGES = {
+    VALID: "",
+    INCOMPLETE: "Puzzle is incomplete. Please fill all cells.",
+    OUT_OF_RANGE: "Values must be between 1 and N.",
+    DUPLICATE: "Duplicate in row or column",
+    INEQUALITY: "Inequality condition not met",
+    GIVEN_CHANGED: "A given value was changed",
+}
+
+_pair_cache = {}
+
+
+def pair_indices(size):
+    # Flat cell indices of the first and second cell of every adjacent pair
+    if size not in _pair_cache:
+        pairs = list(adjacent_pairs(size))
+        first = np.array([row * size + col for (row, col), _ in pairs], dtype=np.intp)
+        second = np.array([row * size + col for _, (row, col) in pairs], dtype=np.intp)
+        _pair_cache[size] = first, second
+    return _pair_cache[size]
+
+
+def encode_inequalities(inequalities, size):
+    encoded = np.zeros(2 * size * (size - 1), dtype=np.int8)
+    for number, pair in enumerate(adjacent_pairs(size)):
+        sign = inequalities.get(pair)
+        if sign is not None:
+            encoded[number] = 1 if relation(sign) == LESS else -1
+    return encoded
+
+
+def validate_boards(boards, inequalities, puzzles=None):
+    # One status code per board; where a board breaks several rules the code
+    # is the one check_solution would have raised first
+    boards = np.asarray(boards)
+    count, size, _ = boards.shape
+    flat = boards.reshape(count, size * size)
+    status = np.zeros(count, dtype=np.int8)
+
+    # Checked from the last rule to the first so earlier rules overwrite
+    if puzzles is not None:
+        puzzles = np.asarray(puzzles).reshape(-1, size * size)
+        changed = ((puzzles != 0) & (flat != puzzles)).any(axis=1)
+        status[changed] = GIVEN_CHANGED
+
+    inequalities = np.asarray(inequalities, dtype=np.int8).reshape(-1, 2 * size * (size - 1))
+    first, second = pair_indices(size)
+    a = flat[:, first]
+    b = flat[:, second]
+    broken = ((inequalities == 1) & (a >= b)) | ((inequalities == -1) & (a <= b))
+    status[broken.any(axis=1)] = INEQUALITY
+
+    # A row or column holds each value once iff the OR of its value bits is full
+    in_range = (boards >= 1) & (boards <= size)
+    shifts = (boards.astype(np.int32) - 1).clip(0, 30)
+    bits = np.where(in_range, np.left_shift(np.int32(1), shifts), 0)
+    full = (1 << size) - 1
+    rows_ok = (np.bitwise_or.reduce(bits, axis=2) == full).all(axis=1)
+    cols_ok = (np.bitwise_or.reduce(bits, axis=1) == full).all(axis=1)
+    status[~(rows_ok & cols_ok)] = DUPLICATE
+
+    # check_solution scans cell by cell, so the first bad cell decides
+    # between an empty cell and an out-of-range value
+    bad = ~in_range.reshape(count, -1)
+    any_bad = bad.any(axis=1)
+    first_bad = flat[np.arange(count), bad.argmax(axis=1)]
+    status[any_bad] = np.where(first_bad[any_bad] == 0, INCOMPLETE, OUT_OF_RANGE)
+    return status
+
+
+# Random Latin squares in batches. Every square starts as a random isotope of
+# the cyclic square (rows, columns and symbols each permuted), then takes
+# Jacobson-Matthews moves on its incidence cube, all squares stepping at once.
+# Isotopes alone only reach squares isotopic to the cyclic one; the moves
+# spread the batch over all Latin squares. `mixing` scales the number of
+# moves, in units of n**3 (the usual rule of thumb for a well-mixed chain);
+# 0 skips them. Only moves that end on a proper square count: stopping at
+# the first proper square after a fixed number of moves of either kind
+# would favour squares that are reached through long improper detours.
+#
+# A full n**3 is slower than the scalar solver's one backtracking search per
+# board (~270 against ~830 8x8 boards/s); the two break even near 0.35. The
+# default of 0.1 makes ~2800/s at 8x8 and ~1100/s at 10x10, about 3-4 times
+# the scalar rate, and still moves every square well away from its isotope.
+
+DEFAULT_MIXING = 0.1
+
+
+def isotopes(size, count, rng):
+    cyclic = (np.arange(size)[:, None] + np.arange(size)[None, :]) % size
+    rows = rng.permuted(np.tile(np.arange(size), (count, 1)), axis=1)
+    cols = rng.permuted(np.tile(np.arange(size), (count, 1)), axis=1)
+    symbols = rng.permuted(np.tile(np.arange(size), (count, 1)), axis=1)
+    squares = cyclic[rows[:, :, None], cols[:, None, :]]
+    return np.take_along_axis(symbols, squares.reshape(count, -1), axis=1).reshape(count, size, size)
+
+
+def pick_one(line, rng):
+    # Index of a random 1 along the last axis (there are one or two)
+    return np.argmax((line == 1) * rng.random(line.shape), axis=-1)
+
+
+def jacobson_matthews(cube, batch, improper, rng):
+    # One move for each square in `batch`; cube is (N, n, n, n) with
+    # cube[k, r, c, s] == 1 iff square k has symbol s at (r, c). An improper
+    # square holds a single -1 at `improper[k]` and is moved from there,
+    # a proper one from a random 0.
+    count, size = len(batch), cube.shape[1]
+    r = rng.integers(size, size=count)
+    c = rng.integers(size, size=count)
+    current = np.argmax(cube[batch, r, c], axis=1)
+    s = (current + 1 + rng.integers(size - 1, size=count)) % size
+    start = improper[batch]
+    bad = start[:, 0] >= 0
+    r = np.where(bad, start[:, 0], r)
+    c = np.where(bad, start[:, 1], c)
+    s = np.where(bad, start[:, 2], s)
+
+    r2 = pick_one(cube[batch, :, c, s], rng)
+    c2 = pick_one(cube[batch, r, :, s], rng)
+    s2 = pick_one(cube[batch, r, c, :], rng)
+    cube[batch, r, c, s] += 1
+    cube[batch, r2, c, s] -= 1
+    cube[batch, r, c2, s] -= 1
+    cube[batch, r, c, s2] -= 1
+    cube[batch, r2, c2, s] += 1
+    cube[batch, r2, c, s2] += 1
+    cube[batch, r, c2, s2] += 1
+    cube[batch, r2, c2, s2] -= 1
+
+    now_bad = cube[batch, r2, c2, s2] < 0
+    improper[batch] = np.where(now_bad[:, None], np.stack([r2, c2, s2], axis=1), -1)
+    return ~now_bad
+
+
+def latin_squares(size, count, rng=None, mixing=DEFAULT_MIXING):
+    # (count, size, size) int8 array of random Latin squares with values 1..size
+    rng = np.random.default_rng(rng)
+    squares = isotopes(size, count, rng)
+    steps = int(mixing * size ** 3)
+    # Up to order 3 every Latin square is an isotope of the cyclic one
+    if size > 3 and steps:
+        cube = np.zeros((count, size, size, size), dtype=np.int8)
+        np.put_along_axis(cube, squares[..., None], 1, axis=3)
+        improper = np.full((count, 3), -1)
+        moves = np.zeros(count, dtype=np.int64)
+        batch = np.arange(count)
+        while len(batch):
+            moves[batch] += jacobson_matthews(cube, batch, improper, rng)
+            batch = np.flatnonzero(moves < steps)
+        squares = np.argmax(cube, axis=3)
+    return (squares + 1).astype(np.int8)
@@ -0,0 +1,75 @@
+from .constraints import satisfies
+
+
+def empty_board(size):
+    return [[0] * size for _ in range(size)]
+
+
+def copy_board(board):
+    return [row[:] for row in board]
+
+
+def check_solution(board, inequalities):
+    # Raises ValueError describing the first rule the board breaks
+    size = len(board)
+    for row in board:
+        for value in row:
+            if not value:
+                raise ValueError("Puzzle is incomplete. Please fill all cells.")
+            if not 1 <= value <= size:
+                raise ValueError(f"Values must be between 1 and {size}.")
+
+    for row in range(size):
+        if len(set(board[row])) != size or len(set(board[i][row] for i in range(size))) != size:
+            raise ValueError("Duplicate in row or column")
+
+    for ((row1, col1), (row2, col2)), sign in inequalities.items():
+        if not satisfies(board[row1][col1], sign, board[row2][col2]):
+            raise ValueError(f"Inequality condition not met at {row1, col1} {sign} {row2, col2}")
+
+
+class Puzzle:
+    def __init__(self, size, difficulty, puzzle, inequalities, solution=None, rating=None, seed=None):
+        self.size = size
+        self.difficulty = difficulty
+        self.puzzle = puzzle
+        self.inequalities = inequalities
+        self.solution = solution
+        self.rating = rating
+        # Set on puzzles made by seeds.seeded_puzzle, which can make them again
+        self.seed = seed
+
+    def copy(self):
+        return Puzzle(self.size, self.difficulty, copy_board(self.puzzle), dict(self.inequalities),
+                      copy_board(self.solution) if self.solution is not None else None, self.rating, self.seed)
+
+    def givens(self):
+        return sum(1 for row in self.puzzle for value in row if value)
+
+    def is_solved_by(self, board):
+        try:
+            check_solution(board, self.inequalities)
+        except ValueError:
+            return False
+        return all(given in (0, value) for given_row, row in zip(self.puzzle, board)
+                   for given, value in zip(given_row, row))
+
+    def to_dict(self):
+        return {
+            'size': self.size,
+            'difficulty': self.difficulty,
+            'puzzle': self.puzzle,
+            'inequalities': [[r1, c1, r2, c2, sign] for ((r1, c1), (r2, c2)), sign in self.inequalities.items()],
+            'solution': self.solution,
+            'rating': self.rating,
+            'seed': self.seed,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        inequalities = {((r1, c1), (r2, c2)): sign for r1, c1, r2, c2, sign in data['inequalities']}
+        return cls(data['size'], data['difficulty'], data['puzzle'], inequalities,
+                   data.get('solution'), data.get('rating'), data.get('seed'))
+
+    def __repr__(self):
+        return f"Puzzle(size={self.size}, difficulty={self.difficulty!r}, givens={self.givens()}, inequalities={len(self.inequalities)})"
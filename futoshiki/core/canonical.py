@@ -0,0 +1,152 @@
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+
+from .constraints import LESS, adjacent_pairs, relation
+
+# Two puzzles are the same puzzle if one turns into the other by a symmetry
+# of the square (rotations, reflections, including the transpose, which
+# turns horizontal signs into vertical ones) and/or by reversing the values
+# (v -> n + 1 - v, which flips every sign). The canonical form is the
+# smallest encoding over all 16 of these, so equivalent puzzles share it.
+#
+# Encoding: the givens in row order, one byte per cell, then one byte per
+# adjacent pair in adjacent_pairs order: 0 no sign, 1 first cell smaller,
+# 2 first cell greater.
+
+CELL_MAPS = [
+    lambda row, col, last: (row, col),
+    lambda row, col, last: (col, last - row),
+    lambda row, col, last: (last - row, last - col),
+    lambda row, col, last: (last - col, row),
+    lambda row, col, last: (col, row),
+    lambda row, col, last: (row, last - col),
+    lambda row, col, last: (last - row, col),
+    lambda row, col, last: (last - col, last - row),
+]
+
+
+def ordered_pairs(inequalities):
+    # (smaller cell, larger cell) for every sign
+    return [(first, second) if relation(sign) == LESS else (second, first)
+            for (first, second), sign in inequalities.items()]
+
+
+def encode(size, givens, ordered):
+    pairs = set(ordered)
+    codes = bytearray()
+    for first, second in adjacent_pairs(size):
+        if (first, second) in pairs:
+            codes.append(1)
+        elif (second, first) in pairs:
+            codes.append(2)
+        else:
+            codes.append(0)
+    return bytes(value for row in givens for value in row) + bytes(codes)
+
+
+def canonical_form(puzzle, inequalities):
+    size = len(puzzle)
+    last = size - 1
+    ordered = ordered_pairs(inequalities)
+    best = None
+    for cell_map in CELL_MAPS:
+        moved = [[0] * size for _ in range(size)]
+        for row in range(size):
+            for col in range(size):
+                new_row, new_col = cell_map(row, col, last)
+                moved[new_row][new_col] = puzzle[row][col]
+        moved_pairs = [(cell_map(*smaller, last), cell_map(*larger, last)) for smaller, larger in ordered]
+        reversed_givens = [[size + 1 - value if value else 0 for value in row] for row in moved]
+        reversed_pairs = [(larger, smaller) for smaller, larger in moved_pairs]
+        for form in (encode(size, moved, moved_pairs), encode(size, reversed_givens, reversed_pairs)):
+            if best is None or form < best:
+                best = form
+    return best
+
+
+def canonical_hash(puzzle, inequalities):
+    # 64-bit hash of the canonical form, as an int
+    digest = hashlib.blake2b(bytes([len(puzzle)]) + canonical_form(puzzle, inequalities), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little')
+
+
+HASH = struct.Struct('<Q')
+BLOOM_BITS_PER_HASH = 10
+BLOOM_PROBES = 7
+
+
+class DedupIndex:
+    # Canonical hashes of every puzzle already generated, kept on disk as a
+    # sorted array of uint64. A Bloom filter built on load answers "never
+    # seen" in constant time; only its (rare) positives are confirmed by a
+    # binary search over the mmapped file. Hashes added since the last save
+    # live in a set until save() merges them in.
+
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self.count = 0
+        self.pending = set()
+        self.load()
+
+    def load(self):
+        self.close()
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            with open(self.path, 'rb') as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.count = len(self.data) // HASH.size
+        self.bloom_size = max(64, self.count * BLOOM_BITS_PER_HASH)
+        self.bloom = bytearray((self.bloom_size + 7) // 8)
+        for (value,) in HASH.iter_unpack(self.data or b''):
+            for bit in self.probes(value):
+                self.bloom[bit >> 3] |= 1 << (bit & 7)
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.count = 0
+
+    def probes(self, value):
+        # Double hashing from the two halves of the (already uniform) hash
+        low, high = value & 0xFFFFFFFF, value >> 32 | 1
+        return [(low + i * high) % self.bloom_size for i in range(BLOOM_PROBES)]
+
+    def stored(self, position):
+        return HASH.unpack_from(self.data, position * HASH.size)[0]
+
+    def __contains__(self, value):
+        if value in self.pending:
+            return True
+        if not all(self.bloom[bit >> 3] >> (bit & 7) & 1 for bit in self.probes(value)):
+            return False
+        position = bisect.bisect_left(range(self.count), value, key=self.stored)
+        return position < self.count and self.stored(position) == value
+
+    def __len__(self):
+        return self.count + len(self.pending)
+
+    def add(self, value):
+        # Returns False if the hash was already known
+        if value in self:
+            return False
+        self.pending.add(value)
+        return True
+
+    def add_puzzle(self, puzzle):
+        return self.add(canonical_hash(puzzle.puzzle, puzzle.inequalities))
+
+    def save(self):
+        if not self.pending:
+            return
+        values = sorted(self.pending.union(self.stored(i) for i in range(self.count)))
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(HASH.pack(value) for value in values))
+        self.close()
+        os.replace(tmp_path, self.path)
+        self.pending = set()
+        self.load()
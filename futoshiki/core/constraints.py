@@ -0,0 +1,96 @@
+# Inequalities are stored as {((row1, col1), (row2, col2)): sign} where the
+# first cell is the left (for '<'/'>') or upper (for 'v'/'ʌ') one of the pair.
+# 'v' means the upper cell is greater, 'ʌ' that it is smaller.
+
+HORIZONTAL_SIGNS = ('<', '>')
+VERTICAL_SIGNS = ('ʌ', 'v')
+
+FLIPPED_SIGNS = {'<': '>', '>': '<', 'v': 'ʌ', 'ʌ': 'v'}
+
+LESS = 0     # first cell < second cell
+GREATER = 1  # first cell > second cell
+
+
+def relation(sign):
+    if sign in ('<', 'ʌ'):
+        return LESS
+    if sign in ('>', 'v'):
+        return GREATER
+    raise ValueError(f"Unknown inequality sign: {sign}")
+
+
+def satisfies(first, sign, second):
+    if relation(sign) == LESS:
+        return first < second
+    return first > second
+
+
+def inequality_sign(board, cell1, cell2):
+    (row1, col1), (row2, col2) = cell1, cell2
+    if row1 == row2:
+        return '>' if board[row1][col1] > board[row2][col2] else '<'
+    return 'v' if board[row1][col1] > board[row2][col2] else 'ʌ'
+
+
+def adjacent_pairs(size):
+    for row in range(size):
+        for col in range(size):
+            if col < size - 1:
+                yield (row, col), (row, col + 1)
+            if row < size - 1:
+                yield (row, col), (row + 1, col)
+
+
+def all_inequalities(board):
+    return {pair: inequality_sign(board, *pair) for pair in adjacent_pairs(len(board))}
+
+
+def chain_depths(inequalities):
+    # Longest chain of strictly smaller cells below each cell and of strictly
+    # larger cells above it, over the DAG the inequalities form (smaller ->
+    # larger). Cells without inequalities are left out. Returns None if the
+    # signs contradict each other in a cycle.
+    larger = {}
+    waiting = {}
+    for (first, second), sign in inequalities.items():
+        low, high = (first, second) if relation(sign) == LESS else (second, first)
+        larger.setdefault(low, []).append(high)
+        larger.setdefault(high, [])
+        waiting[high] = waiting.get(high, 0) + 1
+        waiting.setdefault(low, 0)
+
+    order = [cell for cell, count in waiting.items() if not count]
+    for cell in order:
+        for above in larger[cell]:
+            waiting[above] -= 1
+            if not waiting[above]:
+                order.append(above)
+    if len(order) != len(larger):
+        return None
+
+    below = dict.fromkeys(order, 0)
+    for cell in order:
+        for above in larger[cell]:
+            below[above] = max(below[above], below[cell] + 1)
+    above = dict.fromkeys(order, 0)
+    for cell in reversed(order):
+        for higher in larger[cell]:
+            above[cell] = max(above[cell], above[higher] + 1)
+    return below, above
+
+
+def chain_domains(size, inequalities):
+    # Value bitmask per cell (row * size + col, bit v - 1 for value v) allowed
+    # by the chains through it: a cell with k smaller cells chained below it
+    # is at least k + 1, one with k larger cells above it at most size - k
+    full = (1 << size) - 1
+    domains = [full] * (size * size)
+    depths = chain_depths(inequalities or {})
+    if depths is None:
+        return [0] * (size * size)
+    below, above = depths
+    for (row, col), depth in below.items():
+        top = size - above[(row, col)]
+        # A chain longer than the values allow leaves no value for the cell
+        domains[row * size + col] = full & ((1 << top) - 1) & ~((1 << depth) - 1) if top > depth else 0
+    return domains
@@ -0,0 +1,108 @@
+import random
+
+from ..instrument import recorder
+from .board import Puzzle
+from .constraints import FLIPPED_SIGNS, all_inequalities
+from .rating import rate_puzzle
+from .solver import FutoshikiSolver, SearchLimitExceeded, generate_solved_board
+
+# How each difficulty is carved out of a solved board: the share of adjacent
+# pairs that start with an inequality sign, the share of cells that always stay
+# revealed, and whether inequalities the solution does not need are removed too.
+DIFFICULTY_SETTINGS = {
+    'easy': {'inequality_density': 0.35, 'min_revealed': 0.4, 'strip_inequalities': False},
+    'medium': {'inequality_density': 0.3, 'min_revealed': 0.15, 'strip_inequalities': False},
+    'hard': {'inequality_density': 0.3, 'min_revealed': 0.0, 'strip_inequalities': True},
+}
+
+# Uniqueness checks that need more search nodes than their budget are given
+# up on and the clue is kept, which keeps generation time bounded on large
+# grids. Every node propagates the whole grid, so the budget shrinks with the
+# number of cells: CHECK_NODE_BUDGET on 4x4, down to CHECK_NODE_MINIMUM from
+# 14x14 on. Even so, stripping is what generation spends its time on for
+# large grids: ~0.2 s for a 12x12 medium and ~0.4 s (medium) to ~0.7 s (hard)
+# for 15x15 on one core, against ~20 ms for the solved board.
+CHECK_NODE_BUDGET = 100
+CHECK_NODE_MINIMUM = 10
+CHECK_CELL_BUDGET = 2000
+
+
+def check_budget(size):
+    return max(CHECK_NODE_MINIMUM, min(CHECK_NODE_BUDGET, CHECK_CELL_BUDGET // (size * size)))
+
+
+def has_solution(solver, domains, budget=CHECK_NODE_BUDGET):
+    try:
+        return bool(solver.find_solutions(domains, max_nodes=budget))
+    except SearchLimitExceeded:
+        return True
+
+
+def generate_puzzle(board, difficulty='easy', rng=None):
+    rng = rng or random.Random()
+    settings = DIFFICULTY_SETTINGS[difficulty]
+    size = len(board)
+
+    pairs = list(all_inequalities(board).items())
+    rng.shuffle(pairs)
+    inequalities = dict(pairs[:round(len(pairs) * settings['inequality_density'])])
+
+    # Start from the fully revealed board and keep a domain per cell that is
+    # updated in place as givens are removed, so every uniqueness check resumes
+    # from the last accepted state. Because the solution is already known, a
+    # second solution exists only if it differs at the cell being removed:
+    # that is a single-solution search with the old value excluded.
+    solver = FutoshikiSolver(size, inequalities)
+    domains = [1 << (board[row][col] - 1) for row in range(size) for col in range(size)]
+    puzzle = [row[:] for row in board]
+    revealed = size * size
+    budget = check_budget(size)
+    min_revealed = int(size * size * settings['min_revealed'])
+
+    positions = [(row, col) for row in range(size) for col in range(size)]
+    rng.shuffle(positions)
+    for row, col in positions:
+        if revealed <= min_revealed:
+            break
+        i = row * size + col
+        given = domains[i]
+        domains[i] = solver.base[i] & ~given
+        if has_solution(solver, domains, budget):
+            # Removing more clues only adds solutions, so this one stays for good
+            domains[i] = given
+        else:
+            domains[i] = solver.base[i]
+            puzzle[row][col] = 0
+            revealed -= 1
+
+    if settings['strip_inequalities']:
+        # Likewise an inequality is redundant if no solution breaks it, i.e.
+        # if the puzzle has no solution with that sign flipped. The empty
+        # cells start from the chain domains of the flipped signs, since the
+        # ones built so far assume the sign being tested.
+        keys = list(inequalities)
+        rng.shuffle(keys)
+        for key in keys:
+            flipped = dict(inequalities)
+            flipped[key] = FLIPPED_SIGNS[inequalities[key]]
+            flipped_solver = FutoshikiSolver(size, flipped)
+            start = [flipped_solver.base[row * size + col] if not puzzle[row][col] else domains[row * size + col]
+                     for row in range(size) for col in range(size)]
+            if not has_solution(flipped_solver, start, budget):
+                del inequalities[key]
+
+    return puzzle, inequalities
+
+
+def new_puzzle(size, difficulty='easy', rng=None, solution=None):
+    # The solved board may come from elsewhere, e.g. core.batch.latin_squares.
+    # Every random choice is drawn from rng, so a seeded rng gives the same puzzle.
+    rng = rng or random.Random()
+    if solution is None:
+        with recorder.span("generate_solved_board"):
+            solution = generate_solved_board(size, rng=rng)
+    with recorder.span("generate_puzzle"):
+        puzzle, inequalities = generate_puzzle(solution, difficulty, rng)
+    with recorder.span("rate_puzzle"):
+        rating = rate_puzzle(puzzle, inequalities).score
+    return Puzzle(size, difficulty, puzzle, inequalities, solution, rating)
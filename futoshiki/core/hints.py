@@ -0,0 +1,156 @@
+import time
+
+from .constraints import LESS, chain_domains, relation
+
+# Explainable hints for a board in progress. The engine reads the row/column
+# contents straight from a ConflictTracker (which the game already keeps up
+# to date on every edit), derives candidates, and applies human-style rules
+# until one of them forces a placement. Every call stops at a hard time
+# budget so it can run on the Tk event loop.
+
+HINT_BUDGET = 0.02
+
+
+class Hint:
+    def __init__(self, kind, rule, cell, value, explanation, steps=None):
+        self.kind = kind            # 'placement', 'elimination', 'mistake' or 'conflict'
+        self.rule = rule
+        self.cell = cell
+        self.value = value
+        self.explanation = explanation
+        self.steps = steps or []    # eliminations that led to this hint
+
+    def __repr__(self):
+        return f"Hint({self.kind!r}, {self.rule!r}, cell={self.cell}, value={self.value})"
+
+
+def cell_name(cell):
+    return f"row {cell[0] + 1}, column {cell[1] + 1}"
+
+
+def mask_values(mask):
+    return [bit + 1 for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+
+class HintEngine:
+    def __init__(self, tracker, solution=None):
+        self.tracker = tracker
+        self.size = tracker.size
+        self.full = (1 << self.size) - 1
+        self.solution = solution
+        self.relations = [(key, relation(sign)) for key, sign in tracker.inequalities.items()]
+        # Values each cell can take at all given the inequality chains through it
+        self.base = chain_domains(self.size, tracker.inequalities)
+
+    def candidates(self):
+        size = self.size
+        tracker = self.tracker
+        row_used = [0] * size
+        col_used = [0] * size
+        for index in range(size):
+            for value in range(1, size + 1):
+                if tracker.row_cells[index][value]:
+                    row_used[index] |= 1 << (value - 1)
+                if tracker.col_cells[index][value]:
+                    col_used[index] |= 1 << (value - 1)
+        candidates = {}
+        for row in range(size):
+            for col in range(size):
+                value = tracker.values[row][col]
+                if value:
+                    candidates[(row, col)] = 1 << (value - 1)
+                else:
+                    candidates[(row, col)] = self.base[row * size + col] & ~row_used[row] & ~col_used[col]
+        return candidates
+
+    def check_entries(self):
+        tracker = self.tracker
+        if self.solution is not None:
+            for row in range(self.size):
+                for col in range(self.size):
+                    value = tracker.values[row][col]
+                    if value and value != self.solution[row][col]:
+                        return Hint('mistake', 'mistake', (row, col), value,
+                                    f"The {value} at {cell_name((row, col))} is not part of the solution.")
+        for row in range(self.size):
+            for col in range(self.size):
+                if tracker.is_conflicting(row, col):
+                    return Hint('conflict', 'conflict', (row, col), tracker.values[row][col],
+                                f"The {tracker.values[row][col]} at {cell_name((row, col))} breaks a rule.")
+        return None
+
+    def find_single(self, candidates):
+        empty = [cell for cell in candidates if not self.tracker.values[cell[0]][cell[1]]]
+        for cell in empty:
+            mask = candidates[cell]
+            if mask and mask & (mask - 1) == 0:
+                value = mask.bit_length()
+                return Hint('placement', 'naked single', cell, value,
+                            f"Only {value} fits at {cell_name(cell)}: every other value is already in its row "
+                            f"or column or ruled out by an inequality.")
+        for unit_name, cells_of in (('row', lambda i: [(i, c) for c in range(self.size)]),
+                                    ('column', lambda i: [(r, i) for r in range(self.size)])):
+            for index in range(self.size):
+                cells = cells_of(index)
+                for value in range(1, self.size + 1):
+                    bit = 1 << (value - 1)
+                    places = [cell for cell in cells if candidates[cell] & bit]
+                    if len(places) == 1 and not self.tracker.values[places[0][0]][places[0][1]]:
+                        return Hint('placement', f'hidden single ({unit_name})', places[0], value,
+                                    f"{value} can only go at {cell_name(places[0])}: no other cell in "
+                                    f"{unit_name} {index + 1} can hold it.")
+        return None
+
+    def inequality_eliminations(self, candidates):
+        # One pass of bound tightening over every inequality; repeated passes
+        # carry bounds along chains such as a < b < c
+        found = []
+        for (first, second), rel in self.relations:
+            smaller, larger = (first, second) if rel == LESS else (second, first)
+            low_mask, high_mask = candidates[smaller], candidates[larger]
+            if not low_mask or not high_mask:
+                continue
+            highest = high_mask.bit_length()
+            lowest = (low_mask & -low_mask).bit_length()
+            # smaller < highest, larger > lowest
+            removed = low_mask & ~((1 << (highest - 1)) - 1)
+            if removed:
+                candidates[smaller] = low_mask & ~removed
+                found.append(Hint('elimination', 'inequality bound', smaller, mask_values(removed),
+                                  f"{cell_name(smaller)} must be less than {cell_name(larger)}, which is at most "
+                                  f"{highest}, so it cannot be {', '.join(map(str, mask_values(removed)))}."))
+            removed = high_mask & ((1 << lowest) - 1)
+            if removed:
+                candidates[larger] = high_mask & ~removed
+                found.append(Hint('elimination', 'inequality bound', larger, mask_values(removed),
+                                  f"{cell_name(larger)} must be greater than {cell_name(smaller)}, which is at least "
+                                  f"{lowest}, so it cannot be {', '.join(map(str, mask_values(removed)))}."))
+        return found
+
+    def next_hint(self, budget=HINT_BUDGET):
+        deadline = time.perf_counter() + budget
+        problem = self.check_entries()
+        if problem is not None:
+            return problem
+
+        candidates = self.candidates()
+        steps = []
+        while time.perf_counter() < deadline:
+            hint = self.find_single(candidates)
+            if hint is not None:
+                hint.steps = steps
+                return hint
+            found = self.inequality_eliminations(candidates)
+            if not found:
+                break
+            steps += found
+        if steps:
+            return steps[0]
+        if self.solution is not None:
+            # Nothing the rules can show: reveal the most constrained empty cell
+            empty = [cell for cell in candidates if not self.tracker.values[cell[0]][cell[1]]]
+            if empty:
+                cell = min(empty, key=lambda cell: candidates[cell].bit_count())
+                value = self.solution[cell[0]][cell[1]]
+                return Hint('placement', 'reveal', cell, value, f"Try {value} at {cell_name(cell)}.")
+        return None
@@ -0,0 +1,119 @@
+import random
+import threading
+from collections import deque
+
+from ..instrument import recorder
+from .rating import band_distance
+from .seeds import random_seed, seeded_puzzle
+
+
+class PuzzlePool:
+    # Keeps a few ready-made puzzles per (size, difficulty) and refills them on
+    # a background thread, so callers on the Tk main thread never wait for
+    # generation unless the queue they ask for has run dry. With a puzzle bank
+    # attached, an empty queue is served from the bank before generating.
+    # Callers may ask for a rating band; queued puzzles outside it are only
+    # handed out when neither the queue nor the bank has one inside it.
+    # Generated puzzles are seeded (seeds.seeded_puzzle), so any of them can
+    # be rebuilt or shared from its seed; a seeded rng makes the pool itself
+    # reproducible.
+
+    def __init__(self, depth=2, rng=None, bank=None):
+        self.depth = depth
+        self.rng = rng or random.Random()
+        self.bank = bank
+        self.queues = {}
+        self.condition = threading.Condition()
+        self.worker = None
+        self.running = False
+
+    def start(self):
+        with self.condition:
+            if self.worker is None:
+                self.running = True
+                self.worker = threading.Thread(target=self.run, name="puzzle-pool", daemon=True)
+                self.worker.start()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        if self.worker is not None:
+            self.worker.join()
+            self.worker = None
+
+    def prefetch(self, size, difficulty):
+        with self.condition:
+            self.queues.setdefault((size, difficulty), deque())
+            self.condition.notify_all()
+        self.start()
+
+    def get(self, size, difficulty, rating=None):
+        with self.condition:
+            queue = self.queues.setdefault((size, difficulty), deque())
+            puzzle = self.take(queue, rating, exact=True)
+            self.condition.notify_all()
+        self.start()
+        if puzzle is None and self.bank is not None:
+            try:
+                puzzle = self.bank.random(size, difficulty, rating=rating)
+            except ValueError:
+                # Unindexed section or a bank from an older version
+                puzzle = None
+        if puzzle is None:
+            with self.condition:
+                puzzle = self.take(queue, rating, exact=False)
+        if puzzle is None:
+            # The case worth knowing about: the player waits for generation,
+            # so only once rather than until the rating lands in the band
+            recorder.count("pool.miss")
+            puzzle = seeded_puzzle(size, difficulty, random_seed(self.rng), attempts=1)
+            # Its seed rebuilds the puzzle only with the default attempts, so no code is shown for it
+            puzzle.seed = None
+        return puzzle
+
+    def take(self, queue, rating, exact):
+        if not queue:
+            return None
+        if rating is None:
+            return queue.popleft()
+        best = min(queue, key=lambda puzzle: band_distance(puzzle.rating, rating))
+        if exact and band_distance(best.rating, rating):
+            return None
+        queue.remove(best)
+        return best
+
+    def generate(self, size, difficulty):
+        return seeded_puzzle(size, difficulty, random_seed(self.rng))
+
+    def ready(self, size, difficulty):
+        with self.condition:
+            return len(self.queues.get((size, difficulty), ()))
+
+    def next_missing(self):
+        for key, queue in self.queues.items():
+            if len(queue) < self.depth:
+                return key
+        return None
+
+    def run(self):
+        while True:
+            with self.condition:
+                key = self.next_missing()
+                while self.running and key is None:
+                    self.condition.wait()
+                    key = self.next_missing()
+                if not self.running:
+                    return
+            try:
+                puzzle = self.generate(*key)
+            except Exception as e:
+                # Keep the thread alive for the other queues; wait a little before trying again
+                print(f"Error generating a {key[0]}x{key[0]} {key[1]} puzzle: {e}")
+                with self.condition:
+                    self.condition.wait(1.0)
+                continue
+            with self.condition:
+                queue = self.queues[key]
+                if len(queue) < self.depth:
+                    queue.append(puzzle)
@@ -0,0 +1,213 @@
+import math
+
+from .constraints import LESS, relation
+from .solver import FutoshikiSolver, SearchLimitExceeded, grid_layout
+
+# Rates a puzzle by solving it the way a person would: always with the
+# simplest technique that still makes progress, falling back to trial and
+# error (search) only when every technique is stuck. The score grows with the
+# hardest technique needed and with the amount of work per cell, so it can be
+# compared across grid sizes. Everything runs on the same value bitmasks as
+# the solver to keep rating cheap enough to do for every generated puzzle.
+
+# Technique name, level and cost per use, from simplest to hardest
+TECHNIQUES = [
+    ('naked single', 1, 1),
+    ('hidden single', 2, 2),
+    ('inequality bound', 3, 3),
+    ('naked pair', 4, 6),
+    ('search', 5, 25),
+]
+
+LEVELS = {name: level for name, level, _ in TECHNIQUES}
+COSTS = {name: cost for name, _, cost in TECHNIQUES}
+
+MAX_SCORE = 0xFFFF
+# Search nodes counted before giving up and rating the puzzle as if it took
+# this many: about 0.2 s on 15x15, and already past every band's top
+SEARCH_LIMIT = 1024
+
+# The hardest technique puts a puzzle in the hundreds, the work per cell adds
+# up to 99 on top of that and every doubling of the search nodes past the
+# first adds another hundred: node counts are heavy-tailed (a few puzzles in
+# a batch need a hundred times the median), and a log scale keeps those few
+# from swamping everything else. Scores still grow with the grid, so fixed
+# bands do not fit every size. These are the median scores of what the
+# generator makes for each size as (easy, medium, hard), measured with
+# `python -m futoshiki.benchmark bands` (200 puzzles per entry up to 8x8, 80
+# up to 11x11 and 120 above, where medium and hard overlap the most).
+SCORE_MEDIANS = {
+    3: (106, 312, 313),
+    4: (106, 310, 311),
+    5: (307, 312, 314),
+    6: (307, 313, 620),
+    7: (307, 619, 791),
+    8: (307, 786, 931),
+    9: (307, 856, 985),
+    10: (307, 931, 1089),
+    11: (307, 967, 1058),
+    12: (308, 1002, 1171),
+    13: (709, 1023, 1144),
+    14: (781, 1098, 1218),
+    15: (860, 1099, 1278),
+}
+
+
+def split_score(lower, upper):
+    # Halfway between two medians on a log scale; should the harder setting
+    # not rate higher, the easier one keeps everything up to its median
+    return math.isqrt(lower * upper) if upper > lower else lower
+
+
+def rating_bands(size):
+    # {difficulty: (low, high)} score band asked for by each difficulty
+    sizes = sorted(SCORE_MEDIANS)
+    easy, medium, hard = SCORE_MEDIANS[min(max(size, sizes[0]), sizes[-1])]
+    first = split_score(easy, medium)
+    second = max(first + 1, split_score(medium, hard))
+    return {'easy': (0, first), 'medium': (first + 1, second), 'hard': (second + 1, MAX_SCORE)}
+
+
+def rating_band(size, difficulty):
+    return rating_bands(size)[difficulty]
+
+
+def band_distance(rating, band):
+    low, high = band
+    return max(low - rating, rating - high, 0)
+
+
+class Rating:
+    def __init__(self, score, techniques, steps, branches, hardest):
+        self.score = score
+        self.techniques = techniques    # technique name -> times used
+        self.steps = steps              # deductions made without search
+        self.branches = branches        # search nodes needed once stuck
+        self.hardest = hardest
+
+    def __repr__(self):
+        return f"Rating(score={self.score}, hardest={self.hardest!r}, steps={self.steps}, branches={self.branches})"
+
+
+class PuzzleRater:
+    def __init__(self, size, inequalities=None):
+        self.size = size
+        self.full = (1 << size) - 1
+        self.cells = size * size
+        self.peers, self.units = grid_layout(size)
+        self.solver = FutoshikiSolver(size, inequalities)
+        self.pairs = []
+        for ((r1, c1), (r2, c2)), sign in (inequalities or {}).items():
+            first, second = r1 * size + c1, r2 * size + c2
+            # Stored as (smaller, larger)
+            self.pairs.append((first, second) if relation(sign) == LESS else (second, first))
+
+    def naked_single(self, domains, placed):
+        for i, d in enumerate(domains):
+            if not placed[i] and d & (d - 1) == 0:
+                self.place(domains, placed, i)
+                return 1
+        return 0
+
+    def place(self, domains, placed, i):
+        placed[i] = True
+        d = domains[i]
+        for p in self.peers[i]:
+            domains[p] &= ~d
+
+    def hidden_single(self, domains, placed):
+        for unit in self.units:
+            seen_once = 0
+            seen_twice = 0
+            for i in unit:
+                d = domains[i]
+                seen_twice |= seen_once & d
+                seen_once |= d
+            hidden = seen_once & ~seen_twice
+            for i in unit:
+                if not placed[i] and domains[i] & hidden:
+                    domains[i] &= hidden
+                    self.place(domains, placed, i)
+                    return 1
+        return 0
+
+    def inequality_bound(self, domains, placed):
+        # One pass over the signs is one use, however many pairs it narrows,
+        # so a puzzle with more signs does not look like more work
+        changed = 0
+        full = self.full
+        for smaller, larger in self.pairs:
+            low, high = domains[smaller], domains[larger]
+            if not low or not high:
+                continue
+            new_low = low & ((1 << (high.bit_length() - 1)) - 1)
+            new_high = high & full & ~(((low & -low) << 1) - 1)
+            if new_low != low or new_high != high:
+                domains[smaller], domains[larger] = new_low, new_high
+                changed = 1
+        return changed
+
+    def naked_pair(self, domains, placed):
+        for unit in self.units:
+            seen = {}
+            for i in unit:
+                d = domains[i]
+                if d.bit_count() == 2:
+                    if d in seen:
+                        changed = 0
+                        for j in unit:
+                            if j != i and j != seen[d] and domains[j] & d:
+                                domains[j] &= ~d
+                                changed = 1
+                        if changed:
+                            return 1
+                    else:
+                        seen[d] = i
+        return 0
+
+    def rate(self, puzzle):
+        size = self.size
+        domains = [self.full] * self.cells
+        placed = [False] * self.cells
+        # Givens are read off the grid, not deduced
+        for row in range(size):
+            for col in range(size):
+                if puzzle[row][col]:
+                    i = row * size + col
+                    domains[i] &= 1 << (puzzle[row][col] - 1)
+                    self.place(domains, placed, i)
+
+        rules = [(name, getattr(self, name.replace(' ', '_'))) for name, _, _ in TECHNIQUES[:-1]]
+        techniques = {}
+        steps = 0
+        while not all(placed):
+            if not all(domains):
+                raise ValueError("Puzzle has no solution.")
+            for name, rule in rules:
+                used = rule(domains, placed)
+                if used:
+                    techniques[name] = techniques.get(name, 0) + used
+                    steps += used
+                    break
+            else:
+                break
+
+        branches = 0
+        if not all(placed):
+            try:
+                if not self.solver.find_solutions(domains, max_nodes=SEARCH_LIMIT):
+                    raise ValueError("Puzzle has no solution.")
+            except SearchLimitExceeded:
+                pass
+            branches = min(self.solver.nodes, SEARCH_LIMIT)
+            techniques['search'] = branches
+
+        hardest = max(techniques, key=LEVELS.get) if techniques else TECHNIQUES[0][0]
+        work = sum(COSTS[name] * used for name, used in techniques.items())
+        search = round(100 * math.log2(branches)) if branches > 1 else 0
+        score = min(MAX_SCORE, 100 * LEVELS[hardest] + min(99, 10 * work // self.cells) + search)
+        return Rating(score, techniques, steps, branches, hardest)
+
+
+def rate_puzzle(puzzle, inequalities=None):
+    return PuzzleRater(len(puzzle), inequalities).rate(puzzle)
@@ -0,0 +1,206 @@
+import os
+import struct
+import threading
+import time
+
+from .bank import DIFFICULTIES, decode_puzzle, encode_puzzle, nibble_bytes, pack_nibbles, record_size, unpack_nibbles
+
+# A game in progress, saved so it survives closing the window. The file is a
+# small fixed header, the puzzle as a bank record (givens, solution, signs
+# and rating), the player's entries one nibble per cell, then the player
+# names as length-prefixed UTF-8. A 9x9 game takes well under 200 bytes.
+#
+# Files are replaced atomically (written to a .tmp, then os.replace), so a
+# crash mid-write leaves the previous save intact. AutoSaver does the writing
+# on a background thread, a short delay after the last change, so typing is
+# never held up by the disk; FUTOSHIKI_SAVE_FILE moves the file elsewhere.
+
+MAGIC = b'FTSV'
+VERSION = 2
+# magic, version, size, difficulty, mode, whether the puzzle has a seed,
+# elapsed seconds, hints used, player 1 and player 2 times (-1 when not set),
+# rating band (0, 0 for none), seed
+HEADER = struct.Struct('<4sBBBBBdHiiHHQ')
+NAME_LENGTH = struct.Struct('<B')
+# Player times are whole seconds in a signed 32-bit field
+MAX_TIME = 2 ** 31 - 1
+MODES = ['classic', 'adventure', 'duel']
+
+DEFAULT_SAVE_PATH = os.environ.get("FUTOSHIKI_SAVE_FILE") or os.path.join(
+    os.path.expanduser("~"), ".local", "share", "futoshiki", "savegame.bin")
+AUTOSAVE_DELAY = 1.0
+
+
+class GameState:
+    def __init__(self, puzzle, entries, elapsed, mode='classic', hints_used=0, rating=None,
+                 player=None, player1_name="", player2_name="", player1_time=None, player2_time=None):
+        self.puzzle = puzzle
+        self.entries = entries
+        self.elapsed = elapsed
+        self.mode = mode
+        self.hints_used = hints_used
+        self.rating = rating
+        self.player = player
+        self.player1_name = player1_name
+        self.player2_name = player2_name
+        self.player1_time = player1_time
+        self.player2_time = player2_time
+
+    def __repr__(self):
+        return f"GameState({self.puzzle!r}, mode={self.mode!r}, elapsed={self.elapsed:.0f}s)"
+
+
+def encode_name(name):
+    # Cut to 255 bytes on a character boundary, so the name still decodes
+    data = (name or "").encode('utf-8')[:255].decode('utf-8', 'ignore').encode('utf-8')
+    return NAME_LENGTH.pack(len(data)) + data
+
+
+def encode_time(seconds):
+    return -1 if seconds is None else min(max(int(seconds), 0), MAX_TIME)
+
+
+def encode_state(state):
+    puzzle = state.puzzle
+    low, high = state.rating or (0, 0)
+    header = HEADER.pack(MAGIC, VERSION, puzzle.size, DIFFICULTIES.index(puzzle.difficulty), MODES.index(state.mode),
+                         puzzle.seed is not None, state.elapsed, state.hints_used,
+                         encode_time(state.player1_time), encode_time(state.player2_time),
+                         low, high, puzzle.seed or 0)
+    return (header + encode_puzzle(puzzle) + pack_nibbles(state.entries)
+            + encode_name(state.player) + encode_name(state.player1_name) + encode_name(state.player2_name))
+
+
+def decode_state(data):
+    if len(data) < HEADER.size:
+        raise ValueError("Save file is truncated.")
+    (magic, version, size, difficulty, mode, has_seed, elapsed, hints_used,
+     player1_time, player2_time, low, high, seed) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a version {VERSION} save file.")
+    offset = HEADER.size
+    puzzle = decode_puzzle(data[offset:offset + record_size(size)], size, DIFFICULTIES[difficulty])
+    offset += record_size(size)
+    if has_seed:
+        puzzle.seed = seed
+    entries = unpack_nibbles(data[offset:offset + nibble_bytes(size)], size)
+    offset += nibble_bytes(size)
+    names = []
+    for _ in range(3):
+        if offset >= len(data):
+            raise ValueError("Save file is truncated.")
+        (length,) = NAME_LENGTH.unpack_from(data, offset)
+        names.append(data[offset + 1:offset + 1 + length].decode('utf-8'))
+        offset += 1 + length
+    return GameState(puzzle, entries, elapsed, MODES[mode], hints_used, (low, high) if high else None,
+                     names[0] or None, names[1], names[2],
+                     None if player1_time < 0 else player1_time, None if player2_time < 0 else player2_time)
+
+
+def save_state(state, path=DEFAULT_SAVE_PATH):
+    # Encoded first, so a state that cannot be saved leaves no .tmp behind
+    data = encode_state(state)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_state(path=DEFAULT_SAVE_PATH):
+    # None when there is nothing (usable) to resume
+    try:
+        with open(path, 'rb') as f:
+            return decode_state(f.read())
+    except (OSError, ValueError, IndexError, struct.error, UnicodeDecodeError):
+        return None
+
+
+def clear_state(path=DEFAULT_SAVE_PATH):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# Queued in place of a state to delete the save file instead
+CLEARED = object()
+
+
+class AutoSaver:
+    # Writes the most recent state handed to submit() once no newer one has
+    # arrived for `delay` seconds. clear() is queued the same way, so a
+    # write already in progress cannot bring a deleted save back.
+
+    def __init__(self, path=DEFAULT_SAVE_PATH, delay=AUTOSAVE_DELAY):
+        self.path = path
+        self.delay = delay
+        self.pending = None
+        self.deadline = 0.0
+        self.condition = threading.Condition()
+        self.worker = None
+        self.running = False
+
+    def start(self):
+        with self.condition:
+            if self.worker is None:
+                self.running = True
+                self.worker = threading.Thread(target=self.run, name="autosave", daemon=True)
+                self.worker.start()
+
+    def submit(self, state, delay=None):
+        with self.condition:
+            self.pending = state
+            self.deadline = time.monotonic() + (self.delay if delay is None else delay)
+            self.condition.notify_all()
+        self.start()
+
+    def clear(self):
+        self.submit(CLEARED, delay=0)
+
+    def latest(self):
+        # The state a resume would continue from, written yet or not
+        with self.condition:
+            pending = self.pending
+        if pending is CLEARED:
+            return None
+        if pending is not None:
+            return pending
+        return load_state(self.path)
+
+    def stop(self):
+        # Stops the worker and writes anything still pending on this thread
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+            worker = self.worker
+        if worker is not None:
+            worker.join()
+            self.worker = None
+        with self.condition:
+            state, self.pending = self.pending, None
+        if state is not None:
+            self.write(state)
+
+    def write(self, state):
+        try:
+            if state is CLEARED:
+                clear_state(self.path)
+            else:
+                save_state(state, self.path)
+        except OSError as e:
+            print(f"Error saving game: {e}")
+        except (ValueError, struct.error) as e:
+            # A state the format cannot hold; the previous save is left as it was
+            print(f"Error encoding saved game: {e}")
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running and (self.pending is None or time.monotonic() < self.deadline):
+                    timeout = None if self.pending is None else self.deadline - time.monotonic()
+                    self.condition.wait(timeout)
+                if not self.running:
+                    return
+                state, self.pending = self.pending, None
+            self.write(state)
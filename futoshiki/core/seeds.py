@@ -0,0 +1,111 @@
+import random
+import secrets
+import threading
+from collections import OrderedDict
+
+from .generator import DIFFICULTY_SETTINGS, new_puzzle
+from .rating import band_distance, rating_band
+
+# Reproducible puzzles. Every random choice the generator makes comes from
+# one random.Random seeded from (size, difficulty, seed), so those three
+# values are the puzzle: two machines given them build identical boards.
+# A duel code packs them into 64 bits (4 for the size, 2 for the
+# difficulty, 58 for the seed) written as four groups of hex digits.
+
+SEED_BITS = 58
+SEED_MASK = (1 << SEED_BITS) - 1
+CODE_DIFFICULTIES = list(DIFFICULTY_SETTINGS)
+
+# Tries for a puzzle whose rating lies in its difficulty's band before
+# keeping the closest one; part of what a seed means, so changing it changes
+# every seeded puzzle. Each try is a whole generation, most of a second on
+# 15x15, so large grids get fewer: BAND_ATTEMPTS up to 10x10, down to
+# BAND_MIN_ATTEMPTS from 13x13 on.
+BAND_ATTEMPTS = 5
+BAND_MIN_ATTEMPTS = 2
+BAND_CELL_BUDGET = 500
+
+
+def random_seed(rng=None):
+    return rng.getrandbits(SEED_BITS) if rng is not None else secrets.randbits(SEED_BITS)
+
+
+def seeded_rng(size, difficulty, seed):
+    # String seeds are hashed with SHA-512, so this is stable across
+    # processes, platforms and Python versions
+    return random.Random(f"futoshiki:{size}:{difficulty}:{seed}")
+
+
+def band_attempts(size):
+    return max(BAND_MIN_ATTEMPTS, min(BAND_ATTEMPTS, BAND_CELL_BUDGET // (size * size)))
+
+
+def seeded_puzzle(size, difficulty, seed, attempts=None):
+    rng = seeded_rng(size, difficulty, seed)
+    band = rating_band(size, difficulty)
+    candidates = []
+    for _ in range(attempts or band_attempts(size)):
+        candidates.append(new_puzzle(size, difficulty, rng))
+        if not band_distance(candidates[-1].rating, band):
+            break
+    puzzle = min(candidates, key=lambda candidate: band_distance(candidate.rating, band))
+    puzzle.seed = seed
+    return puzzle
+
+
+def duel_code(size, difficulty, seed):
+    if not 0 <= size - 3 < 16 or seed >> SEED_BITS:
+        raise ValueError("Size or seed out of range for a duel code.")
+    value = (size - 3) << 60 | CODE_DIFFICULTIES.index(difficulty) << SEED_BITS | seed
+    digits = f"{value:016X}"
+    return "-".join(digits[i:i + 4] for i in range(0, 16, 4))
+
+
+def parse_duel_code(code):
+    # (size, difficulty, seed); raises ValueError for anything that is not a code
+    digits = code.strip().replace("-", "").replace(" ", "")
+    if len(digits) != 16:
+        raise ValueError("A puzzle code has 16 characters.")
+    value = int(digits, 16)
+    size = (value >> 60) + 3
+    difficulty = value >> SEED_BITS & 3
+    if size > 15 or difficulty >= len(CODE_DIFFICULTIES):
+        raise ValueError("Not a valid puzzle code.")
+    return size, CODE_DIFFICULTIES[difficulty], value & SEED_MASK
+
+
+class PuzzleCache:
+    # Seeded puzzles already built, most recently used last. Callers get a
+    # copy, so filling in a board never changes the cached puzzle.
+
+    def __init__(self, capacity=32):
+        self.capacity = capacity
+        self.puzzles = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, size, difficulty, seed):
+        key = (size, difficulty, seed)
+        with self.lock:
+            puzzle = self.puzzles.get(key)
+            if puzzle is not None:
+                self.puzzles.move_to_end(key)
+                self.hits += 1
+                return puzzle.copy()
+            self.misses += 1
+        # Generated outside the lock; two threads racing on one key build the
+        # same puzzle anyway
+        puzzle = seeded_puzzle(size, difficulty, seed)
+        with self.lock:
+            self.puzzles[key] = puzzle
+            self.puzzles.move_to_end(key)
+            while len(self.puzzles) > self.capacity:
+                self.puzzles.popitem(last=False)
+        return puzzle.copy()
+
+    def __len__(self):
+        return len(self.puzzles)
+
+
+puzzle_cache = PuzzleCache()
@@ -0,0 +1,204 @@
+import random
+from functools import lru_cache
+
+from .constraints import GREATER, LESS, chain_domains, relation
+
+# Each cell keeps a bitmask of the values it may still take: bit (v - 1) set
+# means value v is possible. Domains start from what the inequality chains
+# allow (see constraints.chain_domains); row/column elimination, inequality
+# bounds and hidden singles are then propagated until nothing changes, and the
+# search branches on the cell with the fewest candidates left (MRV).
+
+@lru_cache(maxsize=None)
+def grid_layout(size):
+    # Cells sharing a row or column with each cell, and the rows/columns themselves
+    peers = []
+    for i in range(size * size):
+        row, col = divmod(i, size)
+        cell_peers = [row * size + c for c in range(size) if c != col]
+        cell_peers += [r * size + col for r in range(size) if r != row]
+        peers.append(cell_peers)
+    units = [[row * size + c for c in range(size)] for row in range(size)]
+    units += [[r * size + col for r in range(size)] for col in range(size)]
+    return peers, units
+
+
+class SearchLimitExceeded(Exception):
+    pass
+
+
+class FutoshikiSolver:
+    def __init__(self, size, inequalities=None):
+        self.size = size
+        self.full = (1 << size) - 1
+        self.cells = size * size
+        self.peers, self.units = grid_layout(size)
+        # Starting domain of every cell, already narrowed by inequality chains
+        self.base = chain_domains(size, inequalities)
+
+        # Adjacency index from each cell to the inequalities touching it
+        self.adjacent = [[] for _ in range(self.cells)]
+        for ((r1, c1), (r2, c2)), sign in (inequalities or {}).items():
+            first, second = r1 * size + c1, r2 * size + c2
+            rel = relation(sign)
+            self.adjacent[first].append((second, rel))
+            self.adjacent[second].append((first, GREATER if rel == LESS else LESS))
+
+    def initial_domains(self, puzzle):
+        domains = self.base[:]
+        queue = []
+        for row in range(self.size):
+            for col in range(self.size):
+                value = puzzle[row][col]
+                if value:
+                    i = row * self.size + col
+                    if not 1 <= value <= self.size or not domains[i] >> (value - 1) & 1:
+                        return None, []
+                    domains[i] = 1 << (value - 1)
+                    queue.append(i)
+        # Every inequality endpoint needs its bounds checked at least once
+        queue += [i for i in range(self.cells) if self.adjacent[i]]
+        return domains, queue
+
+    def propagate(self, domains, queue):
+        peers = self.peers
+        adjacent = self.adjacent
+        full = self.full
+        while True:
+            while queue:
+                i = queue.pop()
+                d = domains[i]
+                if d & (d - 1) == 0:
+                    for p in peers[i]:
+                        pd = domains[p]
+                        if pd & d:
+                            pd &= ~d
+                            if not pd:
+                                return False
+                            domains[p] = pd
+                            queue.append(p)
+                for j, rel in adjacent[i]:
+                    if rel == LESS:
+                        # j must exceed the smallest value left in i
+                        low = d & -d
+                        allowed = full & ~((low << 1) - 1)
+                    else:
+                        # j must stay below the largest value left in i
+                        allowed = (1 << (d.bit_length() - 1)) - 1
+                    jd = domains[j]
+                    nd = jd & allowed
+                    if nd != jd:
+                        if not nd:
+                            return False
+                        domains[j] = nd
+                        queue.append(j)
+
+            # Hidden singles: a value with only one possible place in a row/column
+            for unit in self.units:
+                seen_once = 0
+                seen_twice = 0
+                fixed = 0
+                for i in unit:
+                    d = domains[i]
+                    seen_twice |= seen_once & d
+                    seen_once |= d
+                    if d & (d - 1) == 0:
+                        fixed |= d
+                if seen_once != full:
+                    return False
+                hidden = seen_once & ~seen_twice & ~fixed
+                while hidden:
+                    bit = hidden & -hidden
+                    hidden ^= bit
+                    for i in unit:
+                        if domains[i] & bit:
+                            domains[i] = bit
+                            queue.append(i)
+                            break
+            if not queue:
+                return True
+
+    def select_cell(self, domains):
+        best = -1
+        best_count = self.size + 1
+        for i, d in enumerate(domains):
+            if d & (d - 1):
+                count = d.bit_count()
+                if count < best_count:
+                    best, best_count = i, count
+                    if count == 2:
+                        break
+        return best
+
+    def search(self, domains, queue, rng, limit, solutions):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise SearchLimitExceeded()
+        if not self.propagate(domains, queue):
+            return False
+        i = self.select_cell(domains)
+        if i < 0:
+            solutions.append(domains)
+            return len(solutions) >= limit
+        d = domains[i]
+        bits = []
+        while d:
+            bit = d & -d
+            bits.append(bit)
+            d ^= bit
+        if rng is not None:
+            rng.shuffle(bits)
+        for bit in bits:
+            child = domains[:]
+            child[i] = bit
+            if self.search(child, [i], rng, limit, solutions):
+                return True
+        return False
+
+    def run(self, domains, queue, rng, limit, max_nodes):
+        self.nodes = 0
+        self.max_nodes = max_nodes if max_nodes is not None else float('inf')
+        solutions = []
+        # An empty domain (e.g. from contradictory chains) has nothing to search
+        if all(domains):
+            self.search(domains, queue, rng, limit, solutions)
+        return solutions
+
+    def to_board(self, domains):
+        return [[domains[row * self.size + col].bit_length() for col in range(self.size)]
+                for row in range(self.size)]
+
+    def solve(self, puzzle=None, rng=None):
+        if puzzle is None:
+            puzzle = [[0] * self.size for _ in range(self.size)]
+        domains, queue = self.initial_domains(puzzle)
+        if domains is None:
+            return None
+        solutions = self.run(domains, queue, rng, 1, None)
+        return self.to_board(solutions[0]) if solutions else None
+
+    def count_solutions(self, puzzle, limit=2):
+        domains, queue = self.initial_domains(puzzle)
+        if domains is None:
+            return 0
+        return len(self.run(domains, queue, None, limit, None))
+
+    def find_solutions(self, domains, limit=1, rng=None, max_nodes=None):
+        # Search from an explicit domain state, e.g. one the generator keeps
+        # up to date between removals instead of rebuilding it from a grid.
+        # Raises SearchLimitExceeded once more than max_nodes nodes are visited.
+        solutions = self.run(domains[:], list(range(self.cells)), rng, limit, max_nodes)
+        return [self.to_board(solution) for solution in solutions]
+
+
+def solve(puzzle, inequalities=None, rng=None):
+    return FutoshikiSolver(len(puzzle), inequalities).solve(puzzle, rng)
+
+
+def count_solutions(puzzle, inequalities=None, limit=2):
+    return FutoshikiSolver(len(puzzle), inequalities).count_solutions(puzzle, limit)
+
+
+def generate_solved_board(size, inequalities=None, rng=None):
+    # Pass an rng (e.g. random.Random(seed)) for a reproducible board
+    return FutoshikiSolver(size, inequalities).solve(rng=rng or random.Random())
@@ -0,0 +1,218 @@
+import math
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+# Every solve, kept in a local SQLite database for personal bests, ranks and
+# leaderboards. All database work happens on one background thread with its
+# own connection: record() only queues the solve, and solves are written in
+# batches, one transaction each. Queries go through the same queue and
+# return a concurrent.futures.Future, so a screen can ask for its numbers
+# and fill them in when they arrive; since the queue is FIFO they already
+# count every solve recorded before them.
+
+DEFAULT_STATS_PATH = os.environ.get("FUTOSHIKI_STATS_FILE") or os.path.join(
+    os.path.expanduser("~"), ".local", "share", "futoshiki", "stats.sqlite3")
+BATCH_SIZE = 64
+BATCH_DELAY = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solves (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL DEFAULT '',
+    size INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    hints INTEGER NOT NULL DEFAULT 0,
+    seed INTEGER,
+    solved_at REAL NOT NULL
+);
+-- Ranks, percentiles: the times of one (size, difficulty, mode) in order
+CREATE INDEX IF NOT EXISTS solves_by_time ON solves (size, difficulty, mode, seconds);
+-- Personal bests and per-player leaderboards
+CREATE INDEX IF NOT EXISTS solves_by_player ON solves (size, difficulty, mode, player, seconds);
+"""
+
+
+class Solve:
+    __slots__ = ('player', 'size', 'difficulty', 'mode', 'seconds', 'hints', 'seed', 'solved_at')
+
+    def __init__(self, player, size, difficulty, mode, seconds, hints=0, seed=None, solved_at=None):
+        self.player = player or ""
+        self.size = size
+        self.difficulty = difficulty
+        self.mode = mode
+        self.seconds = seconds
+        self.hints = hints
+        self.seed = seed
+        self.solved_at = time.time() if solved_at is None else solved_at
+
+    def row(self):
+        return (self.player, self.size, self.difficulty, self.mode, self.seconds, self.hints, self.seed, self.solved_at)
+
+
+class Standing:
+    # Where one solve places among all solves of its size, difficulty and mode
+    def __init__(self, rank, total, best, previous_best, faster_than):
+        self.rank = rank                    # 1 for the fastest time
+        self.total = total
+        self.best = best                    # the player's best, this solve included
+        self.previous_best = previous_best  # None on their first solve
+        self.faster_than = faster_than      # share of other solves that were slower
+
+    @property
+    def new_best(self):
+        return self.previous_best is not None and self.best < self.previous_best
+
+    def __repr__(self):
+        return f"Standing(rank={self.rank}/{self.total}, best={self.best:.1f}, faster_than={self.faster_than:.0%})"
+
+
+def standing(connection, solve):
+    group = (solve.size, solve.difficulty, solve.mode)
+    where = "size = ? AND difficulty = ? AND mode = ?"
+    faster, = connection.execute(f"SELECT COUNT(*) FROM solves WHERE {where} AND seconds < ?",
+                                 group + (solve.seconds,)).fetchone()
+    total, = connection.execute(f"SELECT COUNT(*) FROM solves WHERE {where}", group).fetchone()
+    slower, = connection.execute(f"SELECT COUNT(*) FROM solves WHERE {where} AND seconds > ?",
+                                 group + (solve.seconds,)).fetchone()
+    best, = connection.execute(f"SELECT MIN(seconds) FROM solves WHERE {where} AND player = ?",
+                               group + (solve.player,)).fetchone()
+    previous_best, = connection.execute(
+        f"SELECT MIN(seconds) FROM solves WHERE {where} AND player = ? AND solved_at < ?",
+        group + (solve.player, solve.solved_at)).fetchone()
+    others = max(1, total - 1)
+    return Standing(faster + 1, total, best if best is not None else solve.seconds, previous_best, slower / others)
+
+
+def leaderboard(connection, size, difficulty, mode, limit=10):
+    # Each player's best time, fastest first: [(player, seconds), ...]
+    return connection.execute(
+        "SELECT player, MIN(seconds) AS best FROM solves WHERE size = ? AND difficulty = ? AND mode = ? "
+        "GROUP BY player ORDER BY best LIMIT ?", (size, difficulty, mode, limit)).fetchall()
+
+
+def percentiles(connection, size, difficulty, mode, fractions=(0.5, 0.9)):
+    # Nearest-rank percentiles of the solve times, {fraction: seconds}
+    where = "size = ? AND difficulty = ? AND mode = ?"
+    group = (size, difficulty, mode)
+    total, = connection.execute(f"SELECT COUNT(*) FROM solves WHERE {where}", group).fetchone()
+    result = {}
+    for fraction in fractions:
+        if total:
+            offset = max(0, math.ceil(fraction * total) - 1)
+            result[fraction], = connection.execute(
+                f"SELECT seconds FROM solves WHERE {where} ORDER BY seconds LIMIT 1 OFFSET ?",
+                group + (offset,)).fetchone()
+        else:
+            result[fraction] = None
+    return result
+
+
+class StatsStore:
+    def __init__(self, path=DEFAULT_STATS_PATH, batch_size=BATCH_SIZE, batch_delay=BATCH_DELAY):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.tasks = queue.Queue()
+        self.worker = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.worker is None:
+                self.worker = threading.Thread(target=self.run, name="stats", daemon=True)
+                self.worker.start()
+
+    def record(self, solve):
+        self.start()
+        self.tasks.put(solve)
+
+    def query(self, function, *args):
+        # function(connection, *args) on the stats thread; returns a Future
+        self.start()
+        future = Future()
+        self.tasks.put((function, args, future))
+        return future
+
+    def standing(self, solve):
+        return self.query(standing, solve)
+
+    def leaderboard(self, size, difficulty, mode, limit=10):
+        return self.query(leaderboard, size, difficulty, mode, limit)
+
+    def percentiles(self, size, difficulty, mode, fractions=(0.5, 0.9)):
+        return self.query(percentiles, size, difficulty, mode, fractions)
+
+    def close(self):
+        # Writes whatever is still queued, then stops the thread
+        with self.lock:
+            worker, self.worker = self.worker, None
+        if worker is not None:
+            self.tasks.put(None)
+            worker.join()
+
+    def connect(self):
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def write(self, connection, pending):
+        if pending:
+            try:
+                with connection:
+                    connection.executemany("INSERT INTO solves (player, size, difficulty, mode, seconds, hints, seed, solved_at) "
+                                           "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", [solve.row() for solve in pending])
+            except sqlite3.Error as e:
+                print(f"Error saving stats: {e}")
+            pending.clear()
+
+    def fail(self, error):
+        # No database: solves are dropped and every query, queued or still
+        # to come, fails with the error instead of waiting forever
+        print(f"Error opening stats: {error}")
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            if not isinstance(task, Solve):
+                task[2].set_exception(error)
+
+    def run(self):
+        try:
+            connection = self.connect()
+        except (OSError, sqlite3.Error) as e:
+            self.fail(e)
+            return
+        pending = []
+        try:
+            while True:
+                try:
+                    task = self.tasks.get(timeout=self.batch_delay) if pending else self.tasks.get()
+                except queue.Empty:
+                    self.write(connection, pending)
+                    continue
+                if task is None:
+                    self.write(connection, pending)
+                    return
+                if isinstance(task, Solve):
+                    pending.append(task)
+                    if len(pending) >= self.batch_size:
+                        self.write(connection, pending)
+                    continue
+                function, args, future = task
+                try:
+                    self.write(connection, pending)
+                    future.set_result(function(connection, *args))
+                except Exception as e:
+                    future.set_exception(e)
+        finally:
+            connection.close()
@@ -0,0 +1,95 @@
+from .constraints import satisfies
+
+# Keeps the rule state of a board that is being filled in one cell at a time.
+# Each change updates per-row/per-column value counts and the inequalities
+# touching that cell, so both the cost of an edit and the cost of asking
+# "is it solved?" stay constant whatever the grid size.
+
+
+class ConflictTracker:
+    def __init__(self, size, inequalities, puzzle=None):
+        self.size = size
+        self.values = [[0] * size for _ in range(size)]
+        # Columns (for rows) and rows (for columns) currently holding each value
+        self.row_cells = [[set() for _ in range(size + 1)] for _ in range(size)]
+        self.col_cells = [[set() for _ in range(size + 1)] for _ in range(size)]
+        self.filled = 0
+        self.duplicates = 0
+        self.inequalities = dict(inequalities)
+        self.constraints_at = {}
+        for key in self.inequalities:
+            for cell in key:
+                self.constraints_at.setdefault(cell, []).append(key)
+        self.violated = set()
+
+        if puzzle is not None:
+            for row in range(size):
+                for col in range(size):
+                    if puzzle[row][col]:
+                        self.set(row, col, puzzle[row][col])
+
+    def set(self, row, col, value):
+        # Returns the cells whose conflict state may have changed
+        old = self.values[row][col]
+        if old == value:
+            return set()
+        changed = {(row, col)}
+        if old:
+            changed |= self.remove(row, col, old)
+        if value:
+            changed |= self.add(row, col, value)
+        self.values[row][col] = value
+
+        for key in self.constraints_at.get((row, col), ()):
+            (row1, col1), (row2, col2) = key
+            first, second = self.values[row1][col1], self.values[row2][col2]
+            if first and second and not satisfies(first, self.inequalities[key], second):
+                self.violated.add(key)
+            else:
+                self.violated.discard(key)
+            changed.update(key)
+        return changed
+
+    def add(self, row, col, value):
+        self.filled += 1
+        in_row = self.row_cells[row][value]
+        in_col = self.col_cells[col][value]
+        # A group of k equal values counts as k - 1 duplicates
+        self.duplicates += (1 if in_row else 0) + (1 if in_col else 0)
+        changed = {(row, c) for c in in_row} | {(r, col) for r in in_col}
+        in_row.add(col)
+        in_col.add(row)
+        return changed
+
+    def remove(self, row, col, value):
+        self.filled -= 1
+        in_row = self.row_cells[row][value]
+        in_col = self.col_cells[col][value]
+        in_row.discard(col)
+        in_col.discard(row)
+        self.duplicates -= (1 if in_row else 0) + (1 if in_col else 0)
+        return {(row, c) for c in in_row} | {(r, col) for r in in_col}
+
+    def is_conflicting(self, row, col):
+        value = self.values[row][col]
+        if not value:
+            return False
+        if len(self.row_cells[row][value]) > 1 or len(self.col_cells[col][value]) > 1:
+            return True
+        return any(key in self.violated for key in self.constraints_at.get((row, col), ()))
+
+    def is_complete(self):
+        return self.filled == self.size * self.size
+
+    def is_solved(self):
+        return self.is_complete() and not self.duplicates and not self.violated
+
+    def check(self):
+        # Same errors as core.check_solution, without rescanning the board
+        if not self.is_complete():
+            raise ValueError("Puzzle is incomplete. Please fill all cells.")
+        if self.duplicates:
+            raise ValueError("Duplicate in row or column")
+        for key in self.violated:
+            (row1, col1), (row2, col2) = key
+            raise ValueError(f"Inequality condition not met at {row1, col1} {self.inequalities[key]} {row2, col2}")
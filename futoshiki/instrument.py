@@ -0,0 +1,115 @@
+import atexit
+import collections
+import functools
+import os
+import threading
+import time
+
+# Opt-in timings for finding out where the game spends its time. Code marks
+# its phases with `with recorder.span("name"):`; while the recorder is off
+# that returns a shared do-nothing object, so the marks can stay in hot paths.
+# When on, each finished span appends one tuple to a fixed-size ring buffer
+# (a deque append, safe from the pool's worker thread too). Enable with
+# FUTOSHIKI_INSTRUMENT=1 or the game's --instrument flag. cProfile and json
+# are only imported when profiling or tracing is asked for, since every core
+# module imports this one.
+
+ENV_VAR = "FUTOSHIKI_INSTRUMENT"
+RING_SIZE = 1024
+
+
+class NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_SPAN = NoSpan()
+
+
+class Span:
+    __slots__ = ('recorder', 'name', 'start')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Recorder:
+    def __init__(self, size=RING_SIZE, enabled=False):
+        self.enabled = enabled
+        self.events = collections.deque(maxlen=size)   # (name, start, seconds, thread)
+        self.counters = collections.Counter()
+        self.origin = time.perf_counter()
+        self.profiler = None
+
+    def span(self, name):
+        return Span(self, name) if self.enabled else NO_SPAN
+
+    def record(self, name, start, seconds):
+        self.events.append((name, start, seconds, threading.current_thread().name))
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] += amount
+
+    def timed(self, name):
+        # Decorator form of span()
+        def decorate(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def last(self, count):
+        return list(self.events)[-count:]
+
+    def start_profile(self, path):
+        # cProfile sees the thread that calls this (the Tk main thread);
+        # stats are written to path when the process exits
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+        atexit.register(self.stop_profile, path)
+
+    def stop_profile(self, path):
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(path)
+            self.profiler = None
+
+    def dump_trace(self, path):
+        # Chrome trace-event JSON (chrome://tracing, Perfetto) of the ring buffer
+        import json
+        threads = {}
+        events = []
+        for name, start, seconds, thread in self.events:
+            events.append({'name': name, 'ph': 'X', 'pid': os.getpid(), 'tid': threads.setdefault(thread, len(threads)),
+                           'ts': (start - self.origin) * 1e6, 'dur': seconds * 1e6})
+        for thread, number in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': number, 'args': {'name': thread}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'otherData': {'counters': dict(self.counters)}}, f)
+
+    def trace_at_exit(self, path):
+        atexit.register(self.dump_trace, path)
+
+
+def enabled_by_env():
+    # FUTOSHIKI_INSTRUMENT=0, false, no or off leave it off like an unset variable
+    return os.environ.get(ENV_VAR, '').strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+
+recorder = Recorder(enabled=enabled_by_env())
@@ -0,0 +1,3 @@
+# Network services built on the headless futoshiki.core package, using only
+# asyncio from the standard library. Nothing here may import tkinter, PIL or
+# pygame.
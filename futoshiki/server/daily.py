@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import datetime
+import hashlib
+import os
+import signal
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from futoshiki.core.generator import DIFFICULTY_SETTINGS
+from futoshiki.core.seeds import SEED_MASK, duel_code, seeded_puzzle
+from futoshiki.server.httpd import HttpError, HttpServer, Response, Router, json_body, json_response
+
+# Puzzle-of-the-day service. Each (date, size, difficulty) has a fixed seed,
+# so every server instance serves the same challenges without sharing state.
+# The next --days days are generated on a process pool before the server
+# accepts connections and topped up after each UTC midnight; requests are
+# answered from pre-encoded JSON held in memory, with ETags so clients can
+# revalidate for free.
+#
+#   GET  /daily                              dates and sizes on offer
+#   GET  /daily/<date|today>                 every challenge of a day
+#   GET  /daily/<date|today>/<size>/<difficulty>
+#   POST /fetch  {"puzzles": [{"date", "size", "difficulty"}, ...]}
+#   POST /check  {"checks": [{"date", "size", "difficulty", "board"}, ...]}
+#   GET  /stats                              handler latency per route
+#
+#   python -m futoshiki.server.daily --port 8080 --days 7
+
+DEFAULT_SIZES = list(range(4, 10))
+DIFFICULTIES = list(DIFFICULTY_SETTINGS)
+DEFAULT_DAYS = 7
+# Most items one /fetch or /check request may ask about
+MAX_BATCH = 1000
+# A challenge never changes once made; the day list does
+PUZZLE_CACHE_CONTROL = 'public, max-age=86400, immutable'
+INDEX_CACHE_CONTROL = 'no-cache'
+
+
+def challenge_seed(day, size, difficulty):
+    digest = hashlib.blake2b(f"daily:{day}:{size}:{difficulty}".encode('ascii'), digest_size=8)
+    return int.from_bytes(digest.digest(), 'little') & SEED_MASK
+
+
+def build_challenge(day, size, difficulty):
+    # Runs in a worker process
+    return day, seeded_puzzle(size, difficulty, challenge_seed(day, size, difficulty))
+
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+
+
+class Challenge:
+    __slots__ = ('body', 'etag', 'solution')
+
+    def __init__(self, day, puzzle):
+        data = puzzle.to_dict()
+        del data['solution']
+        data['date'] = day
+        data['code'] = duel_code(puzzle.size, puzzle.difficulty, puzzle.seed)
+        self.body = json_body(data)
+        self.etag = make_etag(self.body)
+        self.solution = puzzle.solution
+
+
+class DailyChallenges:
+    def __init__(self, sizes=DEFAULT_SIZES, difficulties=DIFFICULTIES, days=DEFAULT_DAYS):
+        self.sizes = sizes
+        self.difficulties = difficulties
+        self.days = days
+        self.challenges = {}    # (date, size, difficulty) -> Challenge
+        self.by_day = {}        # date -> (body, etag) of all its challenges
+        self.index = (b'', '')
+        self.today = None
+
+    def wanted_days(self, today):
+        # Yesterday too: it is still "today" for clients west of UTC
+        return [(today + datetime.timedelta(days=offset)).isoformat() for offset in range(-1, self.days)]
+
+    async def fill(self, executor, today=None):
+        today = today or datetime.datetime.now(datetime.timezone.utc).date()
+        days = self.wanted_days(today)
+        loop = asyncio.get_running_loop()
+        missing = [(day, size, difficulty) for day in days for size in self.sizes for difficulty in self.difficulties
+                   if (day, size, difficulty) not in self.challenges]
+        built = await asyncio.gather(*(loop.run_in_executor(executor, build_challenge, *key) for key in missing))
+        challenges = {key: challenge for key, challenge in self.challenges.items() if key[0] in days}
+        for day, puzzle in built:
+            challenges[(day, puzzle.size, puzzle.difficulty)] = Challenge(day, puzzle)
+        # Swapped in whole, between two requests, since handlers run on this loop
+        self.challenges = challenges
+        self.today = today.isoformat()
+        self.rebuild(days)
+        return len(missing)
+
+    def rebuild(self, days):
+        self.by_day = {}
+        for day in days:
+            parts = [self.challenges[(day, size, difficulty)].body
+                     for size in self.sizes for difficulty in self.difficulties]
+            body = b'{"date":"' + day.encode('ascii') + b'","puzzles":[' + b','.join(parts) + b']}'
+            self.by_day[day] = (body, make_etag(body))
+        body = json_body({'today': self.today, 'dates': days, 'sizes': self.sizes, 'difficulties': self.difficulties})
+        self.index = (body, make_etag(body))
+
+    def resolve_day(self, text):
+        return self.today if text == 'today' else text
+
+    def lookup(self, day, size, difficulty):
+        try:
+            key = (self.resolve_day(day), int(size), difficulty)
+        except (TypeError, ValueError):
+            raise HttpError(400, "Size must be a number.")
+        challenge = self.challenges.get(key)
+        if challenge is None:
+            raise HttpError(404, f"No challenge for {day} {size} {difficulty}.")
+        return challenge
+
+    # Handlers
+
+    def cached(self, request, body, etag, cache_control):
+        headers = {'ETag': etag, 'Cache-Control': cache_control}
+        if request.headers.get('if-none-match') == etag:
+            return Response(304, b'', headers)
+        headers['Content-Type'] = 'application/json'
+        return Response(200, body, headers)
+
+    def get_daily(self, request, segments):
+        if not segments:
+            return self.cached(request, *self.index, INDEX_CACHE_CONTROL)
+        if len(segments) == 1:
+            day = self.resolve_day(segments[0])
+            if day not in self.by_day:
+                raise HttpError(404, f"No challenges for {segments[0]}.")
+            # 'today' moves at midnight, so only dated URLs are immutable
+            cache_control = INDEX_CACHE_CONTROL if segments[0] == 'today' else PUZZLE_CACHE_CONTROL
+            return self.cached(request, *self.by_day[day], cache_control)
+        if len(segments) == 3:
+            challenge = self.lookup(*segments)
+            cache_control = INDEX_CACHE_CONTROL if segments[0] == 'today' else PUZZLE_CACHE_CONTROL
+            return self.cached(request, challenge.body, challenge.etag, cache_control)
+        raise HttpError(404, f"No such resource: {request.path}")
+
+    def batch(self, request, name):
+        data = request.json()
+        items = data.get(name) if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            raise HttpError(400, f"Expected {{\"{name}\": [...]}}.")
+        if len(items) > MAX_BATCH:
+            raise HttpError(413, f"At most {MAX_BATCH} {name} per request.")
+        return items
+
+    def item_challenge(self, item):
+        if not isinstance(item, dict):
+            raise HttpError(400, "Expected an object.")
+        return self.lookup(item.get('date', 'today'), item.get('size'), item.get('difficulty'))
+
+    def post_fetch(self, request, segments):
+        parts = []
+        for item in self.batch(request, 'puzzles'):
+            try:
+                parts.append(self.item_challenge(item).body)
+            except HttpError as e:
+                parts.append(json_body({'error': str(e)}))
+        body = b'{"puzzles":[' + b','.join(parts) + b']}'
+        return Response(200, body, {'Content-Type': 'application/json'})
+
+    def post_check(self, request, segments):
+        results = []
+        for item in self.batch(request, 'checks'):
+            try:
+                challenge = self.item_challenge(item)
+            except HttpError as e:
+                results.append({'error': str(e)})
+                continue
+            # Challenges have a unique solution, so solved means equal to it
+            results.append({'solved': item.get('board') == challenge.solution})
+        return json_response({'results': results})
+
+    def get_stats(self, request, segments):
+        return json_response(self.router.stats())
+
+    def get_health(self, request, segments):
+        return json_response({'ok': True, 'today': self.today, 'challenges': len(self.challenges)})
+
+    def make_router(self):
+        self.router = Router()
+        self.router.add('GET', 'daily', self.get_daily)
+        self.router.add('POST', 'fetch', self.post_fetch)
+        self.router.add('POST', 'check', self.post_check)
+        self.router.add('GET', 'stats', self.get_stats)
+        self.router.add('GET', 'health', self.get_health)
+        return self.router
+
+
+def seconds_to_midnight():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time(),
+                                         tzinfo=datetime.timezone.utc)
+    return (midnight - now).total_seconds()
+
+
+async def serve(host, port, sizes, difficulties, days, workers):
+    # Runs until SIGINT or SIGTERM, then closes connections and worker processes
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for number in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(number, stop.set)
+        except NotImplementedError:
+            pass    # Windows: Ctrl+C still raises KeyboardInterrupt
+    challenges = DailyChallenges(sizes, difficulties, days)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        built = await challenges.fill(executor)
+        print(f"Generated {built} challenges for {challenges.days + 1} days", flush=True)
+        server = HttpServer(challenges.make_router())
+        address = await server.start(host, port)
+        print(f"Serving on http://{address[0]}:{address[1]}", flush=True)
+        try:
+            while not stop.is_set():
+                try:
+                    await asyncio.wait_for(stop.wait(), seconds_to_midnight() + 1)
+                except asyncio.TimeoutError:
+                    built = await challenges.fill(executor)
+                    print(f"New day {challenges.today}: generated {built} challenges", flush=True)
+        finally:
+            await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="futoshiki-daily", description="Serve daily Futoshiki challenges over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--days', type=int, default=DEFAULT_DAYS, help="days ahead to keep ready")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--difficulties', nargs='+', choices=DIFFICULTIES, default=DIFFICULTIES)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="processes used for generation")
+    args = parser.parse_args(argv)
+    if not all(3 <= size <= 15 for size in args.sizes):
+        parser.error("sizes must be between 3 and 15")
+    try:
+        asyncio.run(serve(args.host, args.port, args.sizes, args.difficulties, args.days, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import asyncio
+import collections
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+# Just enough HTTP/1.1 for small JSON services: keep-alive connections,
+# Content-Length bodies (no chunked uploads) and synchronous handlers.
+# Handlers are meant to answer from memory, so they run directly on the
+# event loop; each one's time is kept in a ring buffer for /stats.
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 30.0
+TIMINGS_KEPT = 10000
+
+REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+    413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    def __init__(self, method, target, headers, body):
+        self.method = method
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {name: values[-1] for name, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            raise HttpError(400, "Body is not valid JSON.")
+
+
+class Response:
+    def __init__(self, status=200, body=b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    def encode(self, keep_alive):
+        lines = [f"HTTP/1.1 {self.status} {REASONS.get(self.status, '')}"]
+        headers = {'Content-Length': str(len(self.body)), 'Connection': 'keep-alive' if keep_alive else 'close'}
+        headers.update(self.headers)
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + self.body
+
+
+def json_body(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200, headers=None):
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/json'
+    return Response(status, json_body(data), headers)
+
+
+def error_response(status, message):
+    return json_response({'error': message}, status)
+
+
+class Router:
+    # (method, first path segment) -> handler(request, remaining segments)
+
+    def __init__(self):
+        self.routes = {}
+        self.timings = collections.defaultdict(lambda: collections.deque(maxlen=TIMINGS_KEPT))
+
+    def add(self, method, prefix, handler):
+        self.routes[(method, prefix)] = handler
+
+    def dispatch(self, request):
+        segments = [segment for segment in request.path.split('/') if segment]
+        prefix = segments[0] if segments else ''
+        handler = self.routes.get((request.method, prefix))
+        if handler is None:
+            if any(key[1] == prefix for key in self.routes):
+                return error_response(405, f"{request.method} is not allowed here."), prefix
+            return error_response(404, f"No such resource: {request.path}"), prefix
+        try:
+            return handler(request, segments[1:]), prefix
+        except HttpError as e:
+            return error_response(e.status, str(e)), prefix
+        except Exception as e:
+            print(f"Error handling {request.method} {request.path}: {e!r}")
+            return error_response(500, "Internal error."), prefix
+
+    def handle(self, request):
+        start = time.perf_counter()
+        response, prefix = self.dispatch(request)
+        self.timings[f"{request.method} /{prefix}"].append(time.perf_counter() - start)
+        return response
+
+    def stats(self):
+        result = {}
+        for route, samples in self.timings.items():
+            ordered = sorted(samples)
+            if ordered:
+                result[route] = {
+                    'samples': len(ordered),
+                    'p50_us': ordered[len(ordered) // 2] * 1e6,
+                    'p99_us': ordered[min(len(ordered) - 1, len(ordered) * 99 // 100)] * 1e6,
+                    'max_us': ordered[-1] * 1e6,
+                }
+        return result
+
+
+async def read_request(reader):
+    # None when the client closed the connection between requests
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise HttpError(400, "Incomplete request.")
+        return None
+    except asyncio.LimitOverrunError:
+        raise HttpError(413, "Request headers too large.")
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise HttpError(400, "Malformed request line.")
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', ''):
+        raise HttpError(400, "Chunked request bodies are not supported.")
+    try:
+        length = int(headers.get('content-length') or 0)
+    except ValueError:
+        raise HttpError(400, "Bad Content-Length.")
+    if length < 0 or length > MAX_BODY_BYTES:
+        raise HttpError(413, "Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+    return Request(method, target, headers, body), keep_alive
+
+
+class HttpServer:
+    def __init__(self, router):
+        self.router = router
+        self.server = None
+        self.writers = set()
+
+    async def start(self, host, port):
+        self.server = await asyncio.start_server(self.serve, host, port, limit=MAX_HEADER_BYTES)
+        return self.server.sockets[0].getsockname()
+
+    async def serve(self, reader, writer):
+        self.writers.add(writer)
+        try:
+            while True:
+                try:
+                    parsed = await asyncio.wait_for(read_request(reader), IDLE_TIMEOUT)
+                except HttpError as e:
+                    writer.write(error_response(e.status, str(e)).encode(False))
+                    break
+                if parsed is None:
+                    break
+                request, keep_alive = parsed
+                writer.write(self.router.handle(request).encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            # Idle keep-alive connections see end of file and finish on their own
+            for writer in list(self.writers):
+                writer.close()
+            await self.server.wait_closed()
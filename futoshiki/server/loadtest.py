@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+from futoshiki.benchmark import percentile
+
+# Load generator for the daily challenge service. Each of --connections
+# keep-alive connections sends requests back to back for --duration
+# seconds, drawn from a mix of single fetches (half of them revalidating an
+# ETag), whole-day fetches and bulk /fetch and /check calls. Client-side
+# latency includes the network round trip; the handler latency the server
+# measured itself is read from /stats at the end.
+#
+#   python -m futoshiki.server.loadtest --spawn --connections 50 --duration 10
+
+MIX = {'single': 4, 'revalidate': 4, 'day': 1, 'fetch': 1, 'check': 1}
+BATCH = 20
+
+
+class Client:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, body=None, headers=None):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}"]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        if body is not None:
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(body)}")
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (body or b''))
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        response_headers = {}
+        for line in header_lines:
+            if line:
+                name, _, value = line.partition(':')
+                response_headers[name.strip().lower()] = value.strip()
+        length = int(response_headers.get('content-length', 0))
+        data = await self.reader.readexactly(length) if length else b''
+        return int(status_line.split(' ')[1]), response_headers, data
+
+    async def get_json(self, path):
+        status, _, data = await self.request('GET', path)
+        if status != 200:
+            raise RuntimeError(f"GET {path} returned {status}")
+        return json.loads(data)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def worker(client, keys, etags, deadline, rng, latencies, statuses):
+    names = list(MIX)
+    weights = [MIX[name] for name in names]
+    while time.perf_counter() < deadline:
+        kind = rng.choices(names, weights)[0]
+        day, size, difficulty = rng.choice(keys)
+        path, body, headers = f"/daily/{day}/{size}/{difficulty}", None, None
+        if kind == 'revalidate':
+            headers = {'If-None-Match': etags[(day, size, difficulty)]}
+        elif kind == 'day':
+            path = f"/daily/{day}"
+        elif kind in ('fetch', 'check'):
+            items = [dict(zip(('date', 'size', 'difficulty'), rng.choice(keys))) for _ in range(BATCH)]
+            if kind == 'check':
+                for item in items:
+                    item['board'] = [[0] * item['size'] for _ in range(item['size'])]
+            path = f"/{kind}"
+            body = json.dumps({'puzzles' if kind == 'fetch' else 'checks': items}).encode('utf-8')
+        start = time.perf_counter()
+        status, _, _ = await client.request('POST' if body is not None else 'GET', path, body, headers)
+        latencies.setdefault(kind, []).append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def run(host, port, connections, duration, seed):
+    probe = Client(host, port)
+    await probe.connect()
+    index = await probe.get_json("/daily")
+    keys = [(day, size, difficulty) for day in index['dates'] for size in index['sizes']
+            for difficulty in index['difficulties']]
+    etags = {}
+    for key in keys:
+        _, headers, _ = await probe.request('GET', "/daily/{}/{}/{}".format(*key))
+        etags[key] = headers['etag']
+
+    clients = [Client(host, port) for _ in range(connections)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    latencies = {}
+    statuses = {}
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(client, keys, etags, deadline, random.Random(f"{seed}:{number}"), latencies, statuses)
+                           for number, client in enumerate(clients)))
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+
+    total = sum(len(samples) for samples in latencies.values())
+    print(f"{total} requests in {elapsed:.1f}s over {connections} connections: {total / elapsed:.0f} req/s")
+    print(f"status codes: {dict(sorted(statuses.items()))}")
+    print(f"{'client':<12} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for kind, samples in sorted(latencies.items()):
+        samples.sort()
+        print(f"{kind:<12} {len(samples):>7} {percentile(samples, 0.5) * 1000:>8.2f} "
+              f"{percentile(samples, 0.95) * 1000:>8.2f} {percentile(samples, 0.99) * 1000:>8.2f}")
+
+    stats = await probe.get_json("/stats")
+    probe.close()
+    print(f"{'handler':<12} {'count':>7} {'p50 us':>8} {'p99 us':>8} {'max us':>8}")
+    for route, result in sorted(stats.items()):
+        print(f"{route:<12} {result['samples']:>7} {result['p50_us']:>8.1f} {result['p99_us']:>8.1f} {result['max_us']:>8.1f}")
+    return statuses
+
+
+async def wait_until_up(host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client = Client(host, port)
+            await client.connect()
+            client.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="futoshiki-daily-loadtest", description="Load test the daily challenge service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--spawn', action='store_true', help="start a small server (2 days, sizes 4-6) to test against")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, '-m', 'futoshiki.server.daily', '--host', args.host,
+                                   '--port', str(args.port), '--days', '1', '--sizes', '4', '5', '6'])
+    try:
+        if server is not None:
+            asyncio.run(wait_until_up(args.host, args.port, 120))
+        statuses = asyncio.run(run(args.host, args.port, args.connections, args.duration, args.seed))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    return 0 if set(statuses) <= {200, 304} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
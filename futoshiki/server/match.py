@@ -0,0 +1,504 @@
+import argparse
+import asyncio
+import json
+import queue
+import secrets
+import sys
+import threading
+import time
+
+from futoshiki.core.generator import DIFFICULTY_SETTINGS
+from futoshiki.core.seeds import duel_code, random_seed
+
+# Real-time duel matches. Both players are sent the same (size, difficulty,
+# seed) and build the puzzle themselves (core.seeds), so the server never
+# generates or checks anything: it pairs players, relays progress and
+# reports who finished first. That keeps a match at a few hundred bytes of
+# state, and one process can host thousands of them. Building a large
+# puzzle can take a client a second or two, so the clock only starts once
+# both have said they are ready.
+#
+# The protocol is one JSON object per line over TCP.
+#
+#   -> {"type": "create", "name", "size", "difficulty"}     new private match
+#   -> {"type": "join", "name", "match"}                    join one by its id
+#   -> {"type": "quick", "name", "size", "difficulty"}      pair with anyone
+#   <- {"type": "joined", "match", "player", "size", "difficulty", "seed", "code"}
+#   <- {"type": "start", "names": [...]}                    both are here
+#   -> {"type": "ready"}                                    puzzle built
+#   <- {"type": "go"}                                       both ready, clock running
+#   -> {"type": "progress", "filled"}                       cells filled in
+#   <- {"type": "progress", "player", "filled"}
+#   -> {"type": "solved"}                                  timed by the server
+#   <- {"type": "finished", "player", "time"}
+#   <- {"type": "result", "winner", "times"}
+#   <- {"type": "left", "player"} / {"type": "error", "message"}
+#
+# Progress is coalesced: the server keeps only each player's latest count
+# and one flush loop, every FLUSH_INTERVAL, sends what changed, with all of
+# a connection's messages for that tick in one write. However fast a
+# player types, the opponent gets at most 1 / FLUSH_INTERVAL updates per
+# second.
+
+FLUSH_INTERVAL = 0.1
+MAX_LINE = 64 * 1024
+DIFFICULTIES = list(DIFFICULTY_SETTINGS)
+DEFAULT_PORT = 8790
+CONNECT_TIMEOUT = 5.0
+
+
+def encode(message):
+    return json.dumps(message, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class Player:
+    __slots__ = ('name', 'writer', 'match', 'number', 'filled', 'time', 'ready', 'outbox')
+
+    def __init__(self, name, writer):
+        self.name = name
+        self.writer = writer
+        self.match = None
+        self.number = None
+        self.filled = 0
+        self.time = None
+        self.ready = False
+        self.outbox = []
+
+    def send(self, message):
+        # Queued for the next flush
+        self.outbox.append(encode(message))
+
+    def send_now(self, message):
+        self.outbox.append(encode(message))
+        self.flush()
+
+    def flush(self):
+        if self.outbox and not self.writer.is_closing():
+            self.writer.write(b''.join(self.outbox))
+        self.outbox.clear()
+
+
+class Match:
+    __slots__ = ('id', 'size', 'difficulty', 'seed', 'players', 'dirty', 'started', 'quick')
+
+    def __init__(self, match_id, size, difficulty, seed, quick=False):
+        self.id = match_id
+        self.size = size
+        self.difficulty = difficulty
+        self.seed = seed
+        self.players = []
+        self.dirty = set()      # players whose progress changed since the last flush
+        self.started = None
+        self.quick = quick
+
+    def others(self, player):
+        return [other for other in self.players if other is not player]
+
+
+class MatchServer:
+    def __init__(self, flush_interval=FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        self.matches = {}
+        self.waiting = {}       # (size, difficulty) -> quick match with one player
+        self.dirty = set()      # matches with progress to send
+        self.server = None
+        self.flusher = None
+        self.connections = set()
+        # Progress messages received and relayed; the gap is what coalescing saved
+        self.progress_in = 0
+        self.progress_out = 0
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.serve, host, port, limit=MAX_LINE)
+        self.flusher = asyncio.create_task(self.flush_loop())
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.flusher is not None:
+            self.flusher.cancel()
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.connections):
+                writer.close()
+            await self.server.wait_closed()
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        dirty, self.dirty = self.dirty, set()
+        for match in dirty:
+            self.flush_match(match)
+
+    def flush_match(self, match):
+        for changed in match.dirty:
+            for other in match.others(changed):
+                other.send({'type': 'progress', 'player': changed.number, 'filled': changed.filled})
+                self.progress_out += 1
+        match.dirty.clear()
+        for player in match.players:
+            player.flush()
+
+    async def serve(self, reader, writer):
+        self.connections.add(writer)
+        player = Player("", writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    player.send_now({'type': 'error', 'message': "Message too long."})
+                    break
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    self.handle(player, message)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    player.send_now({'type': 'error', 'message': f"Bad message: {e}"})
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(writer)
+            self.leave(player)
+            writer.close()
+
+    def handle(self, player, message):
+        kind = message['type']
+        if kind in ('create', 'join', 'quick'):
+            if player.match is not None:
+                raise ValueError("already in a match")
+            player.name = str(message.get('name', ''))[:40]
+            if kind == 'join':
+                match = self.matches.get(message['match'])
+                if match is None or len(match.players) >= 2:
+                    player.send_now({'type': 'error', 'message': "No such match, or it is full."})
+                    return
+            else:
+                size, difficulty = int(message['size']), message['difficulty']
+                if not 3 <= size <= 15 or difficulty not in DIFFICULTIES:
+                    raise ValueError("size must be 3-15 and difficulty one of " + ", ".join(DIFFICULTIES))
+                match = self.waiting.pop((size, difficulty), None) if kind == 'quick' else None
+                if match is None:
+                    match = self.new_match(size, difficulty, quick=kind == 'quick')
+            self.add_player(match, player)
+        elif kind == 'progress':
+            match = player.match
+            self.progress_in += 1
+            if match is not None and len(match.players) == 2:
+                player.filled = int(message['filled'])
+                match.dirty.add(player)
+                self.dirty.add(match)
+        elif kind == 'ready':
+            self.ready(player)
+        elif kind == 'solved':
+            self.solved(player)
+        elif kind == 'leave':
+            self.leave(player)
+        else:
+            raise ValueError(f"unknown type {kind!r}")
+
+    def new_match(self, size, difficulty, quick=False):
+        match_id = secrets.token_hex(4)
+        while match_id in self.matches:
+            match_id = secrets.token_hex(4)
+        match = Match(match_id, size, difficulty, random_seed(), quick)
+        self.matches[match_id] = match
+        if quick:
+            self.waiting[(size, difficulty)] = match
+        return match
+
+    def add_player(self, match, player):
+        player.match = match
+        player.number = len(match.players)
+        match.players.append(player)
+        player.send_now({'type': 'joined', 'match': match.id, 'player': player.number, 'size': match.size,
+                         'difficulty': match.difficulty, 'seed': match.seed,
+                         'code': duel_code(match.size, match.difficulty, match.seed)})
+        if len(match.players) == 2:
+            names = [other.name for other in match.players]
+            for other in match.players:
+                other.send_now({'type': 'start', 'names': names})
+
+    def ready(self, player):
+        match = player.match
+        if match is None or len(match.players) < 2 or player.ready:
+            return
+        player.ready = True
+        if all(other.ready for other in match.players):
+            self.start_clock(match)
+
+    def start_clock(self, match):
+        if match.started is None:
+            match.started = time.monotonic()
+            for other in match.players:
+                other.send_now({'type': 'go'})
+
+    def solved(self, player):
+        match = player.match
+        if match is None or len(match.players) < 2 or player.time is not None:
+            return
+        # Solved before the opponent had even built the puzzle: the race starts now
+        self.start_clock(match)
+        # From the server's own clock, so a client cannot claim a faster time
+        seconds = time.monotonic() - match.started
+        player.time = seconds
+        # Progress still queued is older than this, so send it first
+        if match in self.dirty:
+            self.dirty.discard(match)
+            self.flush_match(match)
+        for other in match.players:
+            other.send_now({'type': 'finished', 'player': player.number, 'time': seconds})
+        if all(other.time is not None for other in match.players):
+            self.finish(match)
+
+    def finish(self, match):
+        times = [other.time for other in match.players]
+        winner = min(range(len(times)), key=lambda number: times[number])
+        for other in match.players:
+            other.send_now({'type': 'result', 'winner': winner, 'times': times})
+            other.match = None
+        self.drop(match)
+
+    def leave(self, player):
+        # Ends the match; whoever is left can finish the puzzle on their own
+        match = player.match
+        if match is None:
+            return
+        for other in match.players:
+            other.match = None
+            if other is not player:
+                other.send_now({'type': 'left', 'player': player.number})
+        self.drop(match)
+
+    def drop(self, match):
+        self.matches.pop(match.id, None)
+        self.dirty.discard(match)
+        if self.waiting.get((match.size, match.difficulty)) is match:
+            del self.waiting[(match.size, match.difficulty)]
+
+
+class MatchClient:
+    # asyncio client; incoming messages are put on `events`. send_progress()
+    # only records the latest count, which a background task sends at most
+    # once per interval.
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, interval=FLUSH_INTERVAL):
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.events = asyncio.Queue()
+        self.reader = None
+        self.writer = None
+        self.filled = None
+        self.sent_filled = None
+        self.tasks = []
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=MAX_LINE)
+        self.tasks = [asyncio.create_task(self.receive()), asyncio.create_task(self.send_loop())]
+
+    def send(self, message):
+        self.writer.write(encode(message))
+
+    def create(self, name, size, difficulty):
+        self.send({'type': 'create', 'name': name, 'size': size, 'difficulty': difficulty})
+
+    def join(self, name, match_id):
+        self.send({'type': 'join', 'name': name, 'match': match_id})
+
+    def quick(self, name, size, difficulty):
+        self.send({'type': 'quick', 'name': name, 'size': size, 'difficulty': difficulty})
+
+    def ready(self):
+        self.send({'type': 'ready'})
+
+    def send_progress(self, filled):
+        self.filled = filled
+
+    def solved(self):
+        self.flush_progress()
+        self.send({'type': 'solved'})
+
+    def flush_progress(self):
+        if self.filled != self.sent_filled:
+            self.sent_filled = self.filled
+            self.send({'type': 'progress', 'filled': self.filled})
+
+    async def send_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush_progress()
+
+    async def receive(self):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                await self.events.put(json.loads(line))
+        except (ConnectionError, ValueError):
+            pass
+        await self.events.put({'type': 'closed'})
+
+    async def next_event(self, kind=None, timeout=None):
+        # The next event (of the given type, dropping others)
+        while True:
+            event = await asyncio.wait_for(self.events.get(), timeout)
+            if kind is None or event['type'] in (kind, 'closed', 'error'):
+                return event
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ThreadedMatchClient:
+    # For the Tk game: a MatchClient on its own thread and event loop.
+    # Calls are posted to that loop; events arrive on a queue.Queue that
+    # the Tk side polls with root.after.
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.events = queue.Queue()
+        self.loop = asyncio.new_event_loop()
+        self.client = None
+        self.thread = threading.Thread(target=self.run, args=(host, port), name="match-client", daemon=True)
+        self.connected = threading.Event()
+        self.error = None
+        self.thread.start()
+        self.connected.wait()
+        if self.error is not None:
+            raise self.error
+
+    def run(self, host, port):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.client = MatchClient(host, port)
+            self.loop.run_until_complete(asyncio.wait_for(self.client.connect(), CONNECT_TIMEOUT))
+        except (OSError, asyncio.TimeoutError) as e:
+            self.error = e if isinstance(e, OSError) else OSError(f"no answer from {host}:{port}")
+            self.connected.set()
+            return
+        self.connected.set()
+        self.loop.run_until_complete(self.forward())
+
+    async def forward(self):
+        while True:
+            event = await self.client.events.get()
+            self.events.put(event)
+            if event['type'] == 'closed':
+                return
+
+    def call(self, method, *args):
+        self.loop.call_soon_threadsafe(getattr(self.client, method), *args)
+
+    def create(self, name, size, difficulty):
+        self.call('create', name, size, difficulty)
+
+    def join(self, name, match_id):
+        self.call('join', name, match_id)
+
+    def quick(self, name, size, difficulty):
+        self.call('quick', name, size, difficulty)
+
+    def ready(self):
+        self.call('ready')
+
+    def send_progress(self, filled):
+        self.call('send_progress', filled)
+
+    def solved(self):
+        self.call('solved')
+
+    def poll(self):
+        # Events received so far, without waiting
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def close(self):
+        # Also ends the thread, once forward() sees the 'closed' event
+        if self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop)
+
+    async def shutdown(self):
+        await self.client.close()
+        await self.client.events.put({'type': 'closed'})
+
+
+class LocalMatchServer:
+    # A MatchServer on a background thread of this process: the stand-in
+    # for a real server in tests, or for a duel over the local network
+    # hosted by the game itself. port=0 picks a free port.
+
+    def __init__(self, host='127.0.0.1', port=0, flush_interval=FLUSH_INTERVAL):
+        self.server = MatchServer(flush_interval)
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self.address = None
+        failed = []
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.address = self.loop.run_until_complete(self.server.start(host, port))
+            except Exception as e:
+                # e.g. the port is taken; raised again in the caller's thread
+                failed.append(e)
+                return
+            finally:
+                started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="match-server", daemon=True)
+        self.thread.start()
+        started.wait()
+        if failed:
+            self.thread.join()
+            self.loop.close()
+            raise failed[0]
+
+    @property
+    def port(self):
+        return self.address[1]
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+
+
+async def serve(host, port):
+    server = MatchServer()
+    address = await server.start(host, port)
+    print(f"Match server on {address[0]}:{address[1]}", flush=True)
+    try:
+        while True:
+            await asyncio.sleep(60)
+            print(f"{len(server.matches)} matches, {len(server.connections)} connections, "
+                  f"{server.progress_in} progress updates in, {server.progress_out} out", flush=True)
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="futoshiki-match", description="Relay server for real-time Futoshiki duels.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
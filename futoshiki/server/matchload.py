@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from futoshiki.server.match import LocalMatchServer, MatchClient
+
+# Soak test for the match server: --matches pairs of clients create and
+# join private matches, each player "types" a cell every --keystroke
+# seconds for --duration seconds, then reports solved. Without --port it
+# runs against a LocalMatchServer in this process (server and clients then
+# share the interpreter, so the numbers are a lower bound).
+#
+#   python -m futoshiki.server.matchload --matches 2000 --duration 10
+
+
+async def play(number, host, port, size, keystroke, duration, rng, counts):
+    first, second = MatchClient(host, port), MatchClient(host, port)
+    await first.connect()
+    await second.connect()
+    try:
+        first.create(f"a{number}", size, 'easy')
+        joined = await first.next_event('joined', timeout=60)
+        second.join(f"b{number}", joined['match'])
+        other = await second.next_event('joined', timeout=60)
+        if other.get('seed') != joined['seed']:
+            raise RuntimeError(f"match {joined['match']}: players got different seeds")
+        await first.next_event('start', timeout=60)
+        await second.next_event('start', timeout=60)
+        first.ready()
+        second.ready()
+        await first.next_event('go', timeout=60)
+        await second.next_event('go', timeout=60)
+
+        start = time.perf_counter()
+        filled = [0, 0]
+        while time.perf_counter() - start < duration:
+            await asyncio.sleep(rng.uniform(0.5, 1.5) * keystroke)
+            for index, client in enumerate((first, second)):
+                filled[index] = min(size * size, filled[index] + 1)
+                client.send_progress(filled[index])
+                counts['keystrokes'] += 1
+        first.solved()
+        await asyncio.sleep(rng.uniform(0, keystroke))
+        second.solved()
+        for client in (first, second):
+            event = await client.next_event('result', timeout=60)
+            if event['type'] != 'result':
+                raise RuntimeError(f"match {joined['match']}: {event}")
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def run(host, port, matches, size, keystroke, duration, seed):
+    counts = {'keystrokes': 0}
+    start = time.perf_counter()
+    results = await asyncio.gather(*(play(number, host, port, size, keystroke, duration,
+                                          random.Random(f"{seed}:{number}"), counts)
+                                     for number in range(matches)), return_exceptions=True)
+    failures = [result for result in results if isinstance(result, BaseException)]
+    elapsed = time.perf_counter() - start
+    print(f"{matches - len(failures)}/{matches} matches completed in {elapsed:.1f}s, "
+          f"{counts['keystrokes']} cell entries typed")
+    for failure in failures[:5]:
+        print(f"  failed: {failure!r}")
+    return not failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="futoshiki-matchload", description="Soak test the duel match server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, help="server to test (default: one started in this process)")
+    parser.add_argument('--matches', type=int, default=1000)
+    parser.add_argument('--size', type=int, default=9)
+    parser.add_argument('--keystroke', type=float, default=0.05, help="seconds between each player's cell entries")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds of play per match")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    local = None
+    port = args.port
+    if port is None:
+        local = LocalMatchServer(args.host)
+        port = local.port
+    try:
+        ok = asyncio.run(run(args.host, port, args.matches, args.size, args.keystroke, args.duration, args.seed))
+    finally:
+        if local is not None:
+            server = local.server
+            local.close()
+            print(f"server: {server.progress_in} progress updates in, {server.progress_out} relayed")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
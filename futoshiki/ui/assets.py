@@ -0,0 +1,107 @@
+import os
+import threading
+from collections import OrderedDict
+
+from ..instrument import recorder
+
+# Screens used to decode and LANCZOS-resize their background on every visit.
+# AssetCache does that once per (path, size): resized PIL images are kept in
+# an LRU in memory and written to a per-resolution disk cache (always as
+# PNG, so a JPEG background is not re-compressed on every launch), and the Tk
+# PhotoImage built from them is reused as long as its Tk root is alive.
+# image() may also be called from a loader thread to decode and scale ahead
+# of time; photo() and background() need Tk, so only the Tk thread may call
+# them. PIL is imported on first use, not with the module.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "futoshiki", "images")
+
+
+class AssetCache:
+    def __init__(self, max_items=16, cache_dir=None):
+        self.max_items = max_items
+        self.cache_dir = cache_dir if cache_dir is not None else os.environ.get("FUTOSHIKI_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.images = OrderedDict()
+        self.photos = OrderedDict()
+        self.lock = threading.Lock()
+
+    def remember(self, store, key, value):
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_items:
+            store.popitem(last=False)
+
+    def disk_path(self, path, size):
+        stat = os.stat(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        # Source mtime/size in the name so an edited image is re-scaled
+        return os.path.join(self.cache_dir, f"{size[0]}x{size[1]}", f"{name}-{int(stat.st_mtime)}-{stat.st_size}.png")
+
+    def load_scaled(self, path, size):
+        from PIL import Image
+        cached = None
+        if self.cache_dir:
+            try:
+                cached = self.disk_path(path, size)
+            except OSError:
+                cached = None
+        if cached and os.path.exists(cached):
+            try:
+                image = Image.open(cached)
+                image.load()
+                return image
+            except OSError as e:
+                # Truncated or otherwise unreadable: scaled again and overwritten below
+                print(f"Error reading cached image {cached}: {e}")
+
+        image = Image.open(path)
+        image = image.resize(size, Image.LANCZOS)
+        if cached:
+            # Written under a temporary name and renamed, so a crash never leaves half a file
+            temporary = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(cached), exist_ok=True)
+                image.save(temporary, format='PNG')
+                os.replace(temporary, cached)
+            except OSError as e:
+                print(f"Error caching image: {e}")
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+        return image
+
+    def image(self, path, size):
+        key = (path, tuple(size))
+        with self.lock:
+            image = self.images.get(key)
+        if image is None:
+            with recorder.span(f"image {os.path.basename(path)}"):
+                image = self.load_scaled(path, key[1])
+        with self.lock:
+            self.remember(self.images, key, image)
+        return image
+
+    def photo(self, path, size, master):
+        from PIL import ImageTk
+        key = (path, tuple(size))
+        entry = self.photos.get(key)
+        # A PhotoImage dies with the Tk interpreter that created it
+        root = master._root()
+        if entry is None or entry[0] is not root:
+            entry = (root, ImageTk.PhotoImage(self.image(path, size), master=master))
+        self.remember(self.photos, key, entry)
+        return entry[1]
+
+    def screen_size(self, root):
+        return root.winfo_screenwidth(), root.winfo_screenheight()
+
+    def background(self, path, root):
+        return self.photo(path, self.screen_size(root), root)
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+        self.photos.clear()
+
+
+assets = AssetCache()
@@ -0,0 +1,163 @@
+import tkinter as tk
+
+# The whole board on one Canvas: a rectangle and a text item per cell, one
+# text item per inequality and a cursor outline. Keyboard input goes through
+# a single set of bindings on the canvas, and a change only reconfigures the
+# items of the cells it touches, so drawing and resetting stay cheap up to
+# 15x15 and beyond.
+
+GIVEN_BG = 'lightgray'
+EMPTY_BG = 'white'
+CONFLICT_BG = 'salmon'
+CANVAS_BG = 'lightblue'
+CURSOR_COLOR = 'red'
+PLACEHOLDER_BG = '#eeeeee'
+
+MOVES = {'Up': (-1, 0), 'Down': (1, 0), 'Left': (0, -1), 'Right': (0, 1)}
+
+
+def fit_cell_size(size, available, largest=50, smallest=24):
+    # Cells plus the half-cell gaps that hold the inequality signs
+    return max(smallest, min(largest, int(available / (size * 1.5))))
+
+
+def placeholder_grid(master, size, cell_size=50):
+    # Empty cells laid out exactly as GridCanvas will draw them, for the
+    # first frame of a screen whose puzzle is still being prepared
+    gap = cell_size // 2
+    margin = 4
+    extent = 2 * margin + size * cell_size + (size - 1) * gap
+    canvas = tk.Canvas(master, width=extent, height=extent, bg=CANVAS_BG, highlightthickness=0)
+    pitch = cell_size + gap
+    for row in range(size):
+        for col in range(size):
+            x, y = margin + col * pitch, margin + row * pitch
+            canvas.create_rectangle(x, y, x + cell_size, y + cell_size, fill=PLACEHOLDER_BG, outline='gray')
+    return canvas
+
+
+class GridCanvas(tk.Canvas):
+    def __init__(self, master, size, puzzle, inequalities, cell_size=50, on_change=None, on_input=None):
+        self.size = size
+        self.cell = cell_size
+        self.gap = cell_size // 2
+        self.margin = 4
+        extent = 2 * self.margin + size * cell_size + (size - 1) * self.gap
+        super().__init__(master, width=extent, height=extent, bg=CANVAS_BG, highlightthickness=0)
+
+        self.on_change = on_change
+        self.on_input = on_input
+        self.givens = {(row, col) for row in range(size) for col in range(size) if puzzle[row][col]}
+        self.values = [row[:] for row in puzzle]
+        self.conflicts = set()
+        self.rects = {}
+        self.texts = {}
+        self.cursor = None
+        self.font = ('Arial', max(10, cell_size * 2 // 5))
+
+        self.draw(inequalities)
+        self.bind("<Key>", self.on_key)
+        self.bind("<Button-1>", self.on_click)
+
+    def origin(self, row, col):
+        pitch = self.cell + self.gap
+        return self.margin + col * pitch, self.margin + row * pitch
+
+    def draw(self, inequalities):
+        for row in range(self.size):
+            for col in range(self.size):
+                x, y = self.origin(row, col)
+                given = (row, col) in self.givens
+                self.rects[(row, col)] = self.create_rectangle(
+                    x, y, x + self.cell, y + self.cell, fill=GIVEN_BG if given else EMPTY_BG, outline='black', width=1)
+                value = self.values[row][col]
+                self.texts[(row, col)] = self.create_text(
+                    x + self.cell / 2, y + self.cell / 2, text=str(value) if value else "", font=self.font)
+
+        for ((row1, col1), (row2, col2)), sign in inequalities.items():
+            x, y = self.origin(row1, col1)
+            if row1 == row2:
+                x, y = x + self.cell + self.gap / 2, y + self.cell / 2
+            else:
+                x, y = x + self.cell / 2, y + self.cell + self.gap / 2
+            self.create_text(x, y, text=sign, font=self.font)
+
+        editable = [cell for cell in self.rects if cell not in self.givens]
+        start = min(editable) if editable else (0, 0)
+        self.cursor_cell = start
+        x, y = self.origin(*start)
+        self.cursor = self.create_rectangle(x, y, x + self.cell, y + self.cell, outline=CURSOR_COLOR, width=3)
+
+    def move_cursor(self, row, col):
+        row = min(max(row, 0), self.size - 1)
+        col = min(max(col, 0), self.size - 1)
+        self.cursor_cell = (row, col)
+        x, y = self.origin(row, col)
+        self.coords(self.cursor, x, y, x + self.cell, y + self.cell)
+
+    def cell_at(self, x, y):
+        pitch = self.cell + self.gap
+        col, dx = divmod(x - self.margin, pitch)
+        row, dy = divmod(y - self.margin, pitch)
+        if 0 <= row < self.size and 0 <= col < self.size and dx < self.cell and dy < self.cell:
+            return int(row), int(col)
+        return None
+
+    def on_click(self, event):
+        self.focus_set()
+        cell = self.cell_at(event.x, event.y)
+        if cell is not None:
+            self.move_cursor(*cell)
+
+    def on_key(self, event):
+        if event.keysym in MOVES:
+            d_row, d_col = MOVES[event.keysym]
+            self.move_cursor(self.cursor_cell[0] + d_row, self.cursor_cell[1] + d_col)
+            return
+        row, col = self.cursor_cell
+        if (row, col) in self.givens:
+            return
+        current = self.values[row][col]
+        if event.keysym in ('BackSpace', 'Delete'):
+            self.set_value(row, col, current // 10 if event.keysym == 'BackSpace' else 0)
+        elif event.char.isdigit():
+            digit = int(event.char)
+            # Two-digit values on boards of 10 and up: append while it still fits
+            if current and current * 10 + digit <= self.size:
+                value = current * 10 + digit
+            elif 1 <= digit <= self.size:
+                value = digit
+            else:
+                value = None
+            if value is not None:
+                self.set_value(row, col, value)
+            if self.on_input:
+                self.on_input(value is not None)
+        elif event.char and event.char.isprintable():
+            if self.on_input:
+                self.on_input(False)
+
+    def set_value(self, row, col, value, notify=True):
+        if self.values[row][col] == value:
+            return
+        self.values[row][col] = value
+        self.itemconfigure(self.texts[(row, col)], text=str(value) if value else "")
+        if notify and self.on_change:
+            self.on_change(row, col, value)
+
+    def set_conflict(self, row, col, conflicting):
+        if conflicting == ((row, col) in self.conflicts):
+            return
+        if conflicting:
+            self.conflicts.add((row, col))
+            fill = CONFLICT_BG
+        else:
+            self.conflicts.discard((row, col))
+            fill = GIVEN_BG if (row, col) in self.givens else EMPTY_BG
+        self.itemconfigure(self.rects[(row, col)], fill=fill)
+
+    def reset(self, puzzle):
+        for row in range(self.size):
+            for col in range(self.size):
+                self.set_conflict(row, col, False)
+                self.set_value(row, col, puzzle[row][col], notify=False)
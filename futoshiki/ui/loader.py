@@ -0,0 +1,96 @@
+import threading
+import tkinter as tk
+from concurrent.futures import Future
+from tkinter import ttk
+
+from ..instrument import recorder
+
+# A screen that generates its puzzle and decodes its images in __init__ stays
+# blank until all of it is done. StagedLoader lets it paint a placeholder
+# first: each slow stage runs on a daemon thread and must not touch Tk, and
+# its result is handed to a callback on the Tk thread, which polls the
+# futures with root.after (Tk itself is only ever called from one thread).
+# A stage that raises goes to on_error(name, error) instead; the screen
+# decides whether it can do without it. Results for a screen that is gone
+# by then are dropped.
+
+POLL_INTERVAL = 15
+
+
+def run_in_thread(name, function, *args):
+    future = Future()
+
+    def work():
+        try:
+            with recorder.span(f"load {name}"):
+                future.set_result(function(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=work, name=f"load {name}", daemon=True).start()
+    return future
+
+
+class StagedLoader:
+    def __init__(self, widget, on_done=None, progress=None, on_error=None):
+        self.widget = widget
+        self.on_done = on_done
+        self.progress = progress
+        self.on_error = on_error
+        self.stages = []
+        self.total = 0
+        self.polling = False
+
+    def add(self, name, function, *args, then):
+        # function(*args) on a worker thread, then then(result) on the Tk thread
+        self.stages.append((name, run_in_thread(name, function, *args), then))
+        self.total += 1
+        self.show_progress()
+        if not self.polling:
+            self.polling = True
+            self.widget.after(POLL_INTERVAL, self.poll)
+
+    def poll(self):
+        if not self.widget.winfo_exists():
+            return
+        for stage in [stage for stage in self.stages if stage[1].done()]:
+            self.stages.remove(stage)
+            name, future, then = stage
+            try:
+                result = future.result()
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(name, e)
+                else:
+                    print(f"Error loading {name}: {e}")
+                continue
+            with recorder.span(f"apply {name}"):
+                then(result)
+        if self.stages:
+            self.show_progress()
+            self.widget.after(POLL_INTERVAL, self.poll)
+            return
+        self.polling = False
+        if self.progress is not None:
+            self.progress.destroy()
+            self.progress = None
+        if self.on_done is not None:
+            self.on_done()
+
+    def show_progress(self):
+        if self.progress is not None:
+            self.progress.show(self.total - len(self.stages), self.total, self.stages[0][0])
+
+
+class LoadingProgress(tk.Frame):
+    # A bar and a line of text saying which stage is still running
+    def __init__(self, master, bg, length=300):
+        super().__init__(master, bg=bg)
+        self.label = tk.Label(self, text="Loading...", font=('Arial', 14), bg=bg)
+        self.label.pack(pady=(0, 5))
+        self.bar = ttk.Progressbar(self, orient=tk.HORIZONTAL, length=length, mode='determinate')
+        self.bar.pack()
+
+    def show(self, done, total, waiting_for):
+        self.bar.config(maximum=total, value=done)
+        self.label.config(text=f"Loading {waiting_for}...")
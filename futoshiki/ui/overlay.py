@@ -0,0 +1,43 @@
+import tkinter as tk
+
+# Corner panel listing the most recent spans from an instrument.Recorder.
+# It is a plain Label on the root, so it is lifted above whichever screen
+# Frame the router placed last on every refresh. F12 hides and shows it.
+
+REFRESH_MS = 500
+
+
+class DebugOverlay:
+    def __init__(self, root, recorder, lines=12):
+        self.root = root
+        self.recorder = recorder
+        self.lines = lines
+        self.visible = True
+        self.shown = None
+        self.label = tk.Label(root, font=('Courier', 10), justify=tk.LEFT, anchor='nw',
+                              bg='black', fg='lime', padx=6, pady=4)
+        self.label.place(relx=1.0, y=0, anchor='ne')
+        root.bind_all("<F12>", self.toggle)
+        self.refresh()
+
+    def toggle(self, event=None):
+        self.visible = not self.visible
+        if self.visible:
+            self.label.place(relx=1.0, y=0, anchor='ne')
+        else:
+            self.label.place_forget()
+
+    def refresh(self):
+        if not self.label.winfo_exists():
+            return
+        events = self.recorder.last(self.lines)
+        if self.visible and events != self.shown:
+            self.shown = events
+            text = [f"{name[:28]:<28} {seconds * 1000:8.1f} ms" for name, _, seconds, _ in events]
+            counters = self.recorder.counters
+            if counters:
+                text.append(" ".join(f"{name}={value}" for name, value in sorted(counters.items())))
+            self.label.configure(text="\n".join(text) or "no timings yet")
+        if self.visible:
+            self.label.lift()
+        self.root.after(REFRESH_MS, self.refresh)
@@ -0,0 +1,73 @@
+import tkinter as tk
+
+from ..instrument import recorder
+
+# Every screen used to destroy the window, create a new tk.Tk() and start a
+# nested mainloop. The router keeps one root for the whole session instead:
+# each screen builds itself into a Frame covering the window, and moving to
+# another screen only swaps that Frame. Screens shown with cache=True keep
+# their Frame and are re-placed rather than rebuilt when shown again.
+# A screen may define leave() (called as it is hidden or the window closes)
+# and refresh() (called when its cached Frame is shown again).
+
+
+class Router:
+    def __init__(self, root):
+        self.root = root
+        self.current = None
+        self.cached = {}
+        self.titles = {}
+
+    def new_screen(self, title, bg):
+        # Called by a screen's __init__ to get the Frame it builds into
+        self.root.title(title)
+        frame = tk.Frame(self.root, bg=bg)
+        frame.place(x=0, y=0, relwidth=1, relheight=1)
+        self.titles[str(frame)] = title
+        return frame
+
+    def show(self, screen_class, *args, cache=False, **kwargs):
+        key = (screen_class, args, tuple(sorted(kwargs.items())))
+        screen = self.cached.get(key) if cache else None
+        with recorder.span(f"screen {screen_class.__name__}"):
+            self.hide_current()
+            if screen is None:
+                recorder.count("screen.build")
+                screen = screen_class(self, *args, **kwargs)
+                if cache:
+                    self.cached[key] = screen
+            else:
+                recorder.count("screen.restore")
+                self.restore(screen)
+        self.current = screen
+        return screen
+
+    def hide_current(self):
+        # Click handlers are bound on the root, so they must not outlive the screen
+        self.root.unbind("<Button-1>")
+        screen = self.current
+        self.current = None
+        if screen is None:
+            return
+        leave = getattr(screen, 'leave', None)
+        if leave is not None:
+            leave()
+        if screen in self.cached.values():
+            screen.root.place_forget()
+        else:
+            self.titles.pop(str(screen.root), None)
+            screen.root.destroy()
+
+    def restore(self, screen):
+        self.root.title(self.titles.get(str(screen.root), ""))
+        screen.root.place(x=0, y=0, relwidth=1, relheight=1)
+        message = getattr(screen, 'message_frame', None)
+        if message is not None and message.winfo_exists():
+            self.root.bind("<Button-1>", screen.remove_message)
+        refresh = getattr(screen, 'refresh', None)
+        if refresh is not None:
+            refresh()
+
+    def quit(self):
+        self.hide_current()
+        self.root.destroy()
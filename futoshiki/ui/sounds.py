@@ -0,0 +1,103 @@
+import time
+
+from ..instrument import recorder
+
+# Effects are decoded once into pygame Sounds and played on mixer channels
+# reserved per category, so a burst of key sounds can never steal the channel
+# a button click or the fanfare is playing on. Typing sounds are throttled:
+# holding a key or typing fast replays at most one every TYPING_INTERVAL.
+# pygame is imported on first use, not with the module.
+
+SOUND_FILES = {
+    'valid': "audio1.wav",
+    'invalid': "invalid.wav",
+    'click': "button.wav",
+    'congrats': "congrats.wav",
+}
+
+CATEGORIES = {
+    'valid': 'typing',
+    'invalid': 'typing',
+    'click': 'ui',
+    'congrats': 'fanfare',
+}
+
+CHANNELS_PER_CATEGORY = {
+    'typing': 2,
+    'ui': 2,
+    'fanfare': 1,
+}
+
+MIN_INTERVAL = {
+    'typing': 0.06,
+}
+
+# Kept in place of a Sound that failed to load, so the file is not read again
+# (and the error not reported again) on every play
+MISSING = object()
+
+
+class SoundBank:
+    def __init__(self):
+        self.sounds = {}
+        self.channels = {}
+        self.next_channel = {}
+        self.last_played = {}
+
+    def load(self):
+        # Needs pygame.mixer.init() to have run; safe to call more than once
+        if self.channels:
+            return
+        import pygame
+        with recorder.span("sounds.load"):
+            reserved = sum(CHANNELS_PER_CATEGORY.values())
+            if pygame.mixer.get_num_channels() < reserved + 2:
+                pygame.mixer.set_num_channels(reserved + 2)
+            # Reserved channels are never picked by Sound.play() on its own
+            pygame.mixer.set_reserved(reserved)
+            first = 0
+            for category, count in CHANNELS_PER_CATEGORY.items():
+                self.channels[category] = [pygame.mixer.Channel(i) for i in range(first, first + count)]
+                self.next_channel[category] = 0
+                first += count
+            for name in SOUND_FILES:
+                self.sound(name)
+
+    def sound(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            import pygame
+            try:
+                sound = pygame.mixer.Sound(SOUND_FILES[name])
+            except pygame.error as e:
+                print(f"Error loading sound {SOUND_FILES[name]}: {e}")
+                recorder.count("sounds.missing")
+                sound = MISSING
+            self.sounds[name] = sound
+        return None if sound is MISSING else sound
+
+    def channel(self, category):
+        channels = self.channels[category]
+        for channel in channels:
+            if not channel.get_busy():
+                return channel
+        # All busy: cut off the one that started longest ago
+        index = self.next_channel[category]
+        self.next_channel[category] = (index + 1) % len(channels)
+        return channels[index]
+
+    def play(self, name):
+        self.load()
+        category = CATEGORIES[name]
+        now = time.monotonic()
+        interval = MIN_INTERVAL.get(category)
+        if interval is not None and now - self.last_played.get(category, 0) < interval:
+            return
+        sound = self.sound(name)
+        if sound is None:
+            return
+        self.last_played[category] = now
+        self.channel(category).play(sound)
+
+
+sounds = SoundBank()
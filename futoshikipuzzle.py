@@ -1,25 +1,67 @@
 import tkinter as tk
 from tkinter import messagebox
-import random
+import argparse
+import os
+import threading
 import time
-import pygame
-from PIL import Image, ImageTk
-
-# Initialize Pygame mixer
-pygame.mixer.init()
-
-# Load and play background music
-pygame.mixer.music.load("audio2.mp3")
-pygame.mixer.music.play(-1)  # -1 means the music will loop indefinitely
+from futoshiki.instrument import recorder
+from futoshiki.core.hints import HintEngine
+from futoshiki.core.tracker import ConflictTracker
+from futoshiki.core.bank import PuzzleBank
+from futoshiki.core.pool import PuzzlePool
+from futoshiki.core.rating import rating_band
+from futoshiki.core.savegame import AutoSaver, GameState
+from futoshiki.core.seeds import duel_code, parse_duel_code, puzzle_cache, random_seed
+from futoshiki.core.stats import Solve, StatsStore
+from futoshiki.server.match import DEFAULT_PORT, LocalMatchServer, ThreadedMatchClient
+from futoshiki.ui.assets import assets
+from futoshiki.ui.grid_canvas import GridCanvas, fit_cell_size, placeholder_grid
+from futoshiki.ui.loader import LoadingProgress, StagedLoader
+from futoshiki.ui.overlay import DebugOverlay
+from futoshiki.ui.router import Router
+from futoshiki.ui.sounds import sounds
+
+# Pre-built puzzles, see `python -m futoshiki.core.bank --help`
+BANK_DIR = "puzzle_bank"
+
+# Ready-made puzzles per (size, difficulty), refilled on a background thread
+puzzle_pool = PuzzlePool(bank=PuzzleBank(BANK_DIR) if os.path.isdir(BANK_DIR) else None)
+
+# The game in progress, written on a background thread shortly after each edit
+autosaver = AutoSaver()
+
+# Every solve, for the ranks and personal bests on the congratulations screens
+stats_store = StatsStore()
+
+# Match server started by "Host" in Online Dual, if any
+match_server = None
+
+def show_standing(label, future, name=""):
+    # Fills in the label once the stats thread has answered, polling so the UI never waits on the database
+    if not label.winfo_exists():
+        return
+    if not future.done():
+        label.after(50, show_standing, label, future, name)
+        return
+    try:
+        standing = future.result()
+    except Exception as e:
+        print(f"Error reading stats: {e}")
+        label.config(text="Stats are not available right now.")
+        return
+    best_minutes, best_seconds = divmod(int(standing.best), 60)
+    text = f"Rank {standing.rank} of {standing.total}, personal best {best_minutes:02}:{best_seconds:02}"
+    if standing.new_best:
+        text += " (new!)"
+    label.config(text=f"{name}: {text}" if name else text)
 
 class FutoshikiGame:
-    def __init__(self, root, size=4, difficulty='easy', adventure_mode=False, duel_mode=False, player=None, player1_time=None, player2_time=None, start_time=None, player1_name="", player2_name=""):
-        self.root = root
-        self.root.title("Futoshiki Puzzle")
-        self.root.state('zoomed')
-        self.root.configure(bg='sky blue')
+    def __init__(self, router, size=4, difficulty='easy', adventure_mode=False, duel_mode=False, player=None, player1_time=None, player2_time=None, start_time=None, player1_name="", player2_name="", rating=None, saved=None, seed=None, online=None, player_number=None):
+        self.router = router
+        self.root = router.new_screen("Futoshiki Puzzle", 'sky blue')
         self.size = size
         self.difficulty = difficulty
+        self.rating = rating
         self.adventure_mode = adventure_mode
         self.duel_mode = duel_mode
         self.player = player
@@ -29,156 +71,152 @@ class FutoshikiGame:
         self.player2_name = player2_name
         self.start_time = start_time if start_time is not None else time.time()
         self.timer_running = True
-
-        # Add background image
-        try:
-            self.bg_image = Image.open("puzzlebg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
-            self.background_label = tk.Label(self.root, image=self.bg)
-            self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
-        except Exception as e:
-            print(f"Error loading image: {e}")
-
-        self.entries = {}
+        self.hints_used = 0
+        # ThreadedMatchClient of a real-time duel against another computer, and
+        # which of the match's two players this one is
+        self.online = online
+        self.player_number = player_number
+        # Only games the player has touched (or resumed) are saved
+        self.saving = saved is not None
+
+        self.loaded = False
         self.inequalities = {}
         self.board = [[0] * self.size for _ in range(self.size)]
         self.original_puzzle = []
-        self.generate_solved_board()
-        self.generate_puzzle()
-        self.create_grid()
-        self.create_buttons()
-        self.create_timer()
-        self.update_timer()
 
-        # Load sound files
-        self.valid_sound = pygame.mixer.Sound("audio1.wav")
-        self.invalid_sound = pygame.mixer.Sound("invalid.wav")
-        self.button_click_sound = pygame.mixer.Sound("button.wav")
-        self.congrats_sound = pygame.mixer.Sound("congrats.wav")
+        # The first frame is only an empty grid and a progress bar. The puzzle
+        # and the images are prepared on loader threads, and the screen is
+        # filled in on the Tk thread as each of them arrives.
+        self.placeholder = tk.Frame(master=self.root, bg='lightblue')
+        self.placeholder.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+        cell_size = fit_cell_size(self.size, self.root.winfo_screenheight() * 0.6)
+        placeholder_grid(self.placeholder, self.size, cell_size).pack(padx=5, pady=5)
+        progress = LoadingProgress(self.root, self.root.cget('bg'))
+        progress.place(relx=0.5, rely=0.9, anchor=tk.CENTER)
+
+        self.loader = StagedLoader(self.root, on_done=self.loading_done, progress=progress, on_error=self.loading_failed)
+        # Kept for Retry if the puzzle cannot be prepared
+        self.puzzle_source = (saved, seed, start_time)
+        self.load_puzzle_stage()
+        self.loader.add("background", assets.image, "puzzlebg.jpg", assets.screen_size(self.root), then=self.background_ready)
+        # Decoded now so the welcome message does not have to
+        self.loader.add("images", assets.image, "character.png", (125, 125), then=lambda image: None)
+
+    def load_puzzle_stage(self):
+        saved, seed, start_time = self.puzzle_source
+        self.loader.add("puzzle", self.fetch_puzzle, saved, seed, then=lambda puzzle: self.puzzle_ready(puzzle, saved, start_time))
+
+    def fetch_puzzle(self, saved, seed):
+        # Runs on a loader thread, so no Tk calls in here
+        if saved is not None:
+            # Resuming: the puzzle comes from the save file, nothing is generated
+            return saved.puzzle
+        if seed is not None:
+            return puzzle_cache.get(self.size, self.difficulty, seed)
+        return puzzle_pool.get(self.size, self.difficulty, self.rating)
+
+    def puzzle_ready(self, puzzle, saved, start_time):
+        with recorder.span("game.load_puzzle"):
+            self.load_puzzle(puzzle)
+        self.prefetch_next_puzzles()
+        self.placeholder.destroy()
+        with recorder.span("game.create_grid"):
+            self.create_grid()
+            if saved is not None:
+                self.restore_entries(saved.entries)
+                self.hints_used = saved.hints_used
+        self.create_timer()
 
         # Display title and puzzle size
         self.display_title()
 
-        # Display the initial message
-        self.show_message("Welcome to Futoshiki Puzzle! Fill the grid with numbers according to the rules.")
+        # The clock starts when the puzzle can be played, unless it carries on from earlier
+        if start_time is None:
+            self.start_time = time.time()
+        self.loaded = True
+        self.update_timer()
 
-    def generate_solved_board(self):
-        self.board = [[0] * self.size for _ in range(self.size)]
-        self.solve_board(self.board)
+        if self.online is not None:
+            self.create_opponent_label()
+            # The server starts the match clock once both players have built the puzzle
+            self.online.ready()
+            self.poll_online()
 
-    def solve_board(self, board):
-        for row in range(self.size):
-            for col in range(self.size):
-                if board[row][col] == 0:
-                    nums = list(range(1, self.size + 1))
-                    random.shuffle(nums)
-                    for num in nums:
-                        if self.is_valid(board, row, col, num):
-                            board[row][col] = num
-                            if self.solve_board(board):
-                                return True
-                            board[row][col] = 0
-                    return False
-        return True
-
-    def is_valid(self, board, row, col, num):
-        for i in range(self.size):
-            if board[row][i] == num or board[i][col] == num:
-                return False
-
-        for ((r1, c1), (r2, c2)), sign in self.inequalities.items():
-            if (row == r1 and col == c1) or (row == r2 and col == c2):
-                if (row == r1 and col == c1) and board[r2][c2] != 0:
-                    if sign == '>' and not (num > board[r2][c2]):
-                        return False
-                    if sign == '<' and not (num < board[r2][c2]):
-                        return False
-                    if sign == 'v' and not (num > board[r2][c2]):
-                        return False
-                    if sign == 'ʌ' and not (num < board[r2][c2]):
-                        return False
-                if (row == r2 and col == c2) and board[r1][c1] != 0:
-                    if sign == '>' and not (board[r1][c1] > num):
-                        return False
-                    if sign == '<' and not (board[r1][c1] < num):
-                        return False
-                    if sign == 'v' and not (board[r1][c1] > num):
-                        return False
-                    if sign == 'ʌ' and not (board[r1][c1] < num):
-                        return False
-
-        return True
-
-    def generate_puzzle(self):
-        if self.difficulty == 'easy':
-            num_revealed = self.size * self.size // 2
-            num_inequalities = self.size
-        elif self.difficulty == 'medium':
-            num_revealed = self.size * self.size // 3
-            num_inequalities = self.size - 1
-        elif self.difficulty == 'hard':
-            num_revealed = self.size * self.size // 4
-            num_inequalities = self.size - 2
-
-        positions = [(i, j) for i in range(self.size) for j in range(self.size)]
-        random.shuffle(positions)
-        revealed_positions = positions[:num_revealed]
-
-        self.puzzle = [[self.board[i][j] if (i, j) in revealed_positions else 0 for j in range(self.size)] for i in range(self.size)]
-        self.original_puzzle = [row[:] for row in self.puzzle]
+        # A later adventure level carries the run on, so it is saved straight away
+        if self.adventure_mode and start_time is not None:
+            self.autosave()
 
-        for _ in range(num_inequalities):
-            row1, col1 = random.randint(0, self.size - 1), random.randint(0, self.size - 1)
-            direction = random.choice(['horizontal', 'vertical'])
-            if direction == 'horizontal' and col1 < self.size - 1:
-                row2, col2 = row1, col1 + 1
-            elif direction == 'vertical' and row1 < self.size - 1:
-                row2, col2 = row1 + 1, col1
-            else:
-                continue
+    def background_ready(self, image):
+        # Decoded and scaled on the loader thread; the PhotoImage has to be made here
+        try:
+            with recorder.span("game.background"):
+                self.bg = assets.background("puzzlebg.jpg", self.root)
+                self.background_label = tk.Label(self.root, image=self.bg)
+                self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
+                self.background_label.lower()
+        except Exception as e:
+            print(f"Error loading image: {e}")
 
-            if direction == 'horizontal':
-                if self.board[row1][col1] > self.board[row2][col2]:
-                    sign = '>'
-                else:
-                    sign = '<'
-            elif direction == 'vertical':
-                if self.board[row1][col1] > self.board[row2][col2]:
-                    sign = 'v'
-                else:
-                    sign = 'ʌ'
+    def loading_failed(self, name, error):
+        print(f"Error loading {name}: {error}")
+        if name != "puzzle":
+            # The screen works without its images
+            return
+        self.error_frame = tk.Frame(self.root, bg='lightblue', bd=1, relief=tk.SOLID)
+        self.error_frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
+        error_label = tk.Label(self.error_frame, text=f"The puzzle could not be prepared.\n{error}", font=('Arial', 14), bg='lightblue', wraplength=500)
+        error_label.pack(padx=20, pady=10)
+        button_frame = tk.Frame(self.error_frame, bg='lightblue')
+        button_frame.pack(pady=10)
+        retry_button = tk.Button(button_frame, text="Retry", command=self.retry_button_click, bg='#FF5733', fg='white', font=('Arial', 14), padx=10, pady=5)
+        retry_button.pack(side=tk.LEFT, padx=10)
+        back_button = tk.Button(button_frame, text="Back", command=self.back_button_click, bg='#FF5733', fg='white', font=('Arial', 14), padx=10, pady=5)
+        back_button.pack(side=tk.LEFT, padx=10)
+
+    def retry_button_click(self):
+        self.play_button_click_sound()
+        self.error_frame.destroy()
+        if self.loader.progress is None:
+            self.loader.progress = LoadingProgress(self.root, self.root.cget('bg'))
+            self.loader.progress.place(relx=0.5, rely=0.9, anchor=tk.CENTER)
+        self.load_puzzle_stage()
+
+    def loading_done(self):
+        # Without a puzzle there is nothing for the buttons to act on; Retry loads it again
+        if not self.loaded:
+            return
+        # The progress bar is gone; the buttons take its place
+        with recorder.span("game.create_buttons"):
+            self.create_buttons()
 
-            self.inequalities[((row1, col1), (row2, col2))] = sign
+        # Display the initial message
+        self.show_message("Welcome to Futoshiki Puzzle! Fill the grid with numbers according to the rules.")
+
+    def load_puzzle(self, puzzle):
+        self.current = puzzle
+        self.board = puzzle.solution
+        self.puzzle = puzzle.puzzle
+        self.inequalities = puzzle.inequalities
+        self.original_puzzle = [row[:] for row in self.puzzle]
+
+    def prefetch_next_puzzles(self):
+        # Get the puzzles "New Puzzle" and the next adventure level will ask for
+        # generating in the background while this one is being played
+        puzzle_pool.prefetch(self.size, self.difficulty)
+        if self.adventure_mode and self.size < 8:
+            puzzle_pool.prefetch(self.size + 1, 'easy')
 
     def create_grid(self):
-        validate_cmd = (self.root.register(self.validate_entry), '%P')
+        self.tracker = ConflictTracker(self.size, self.inequalities, self.puzzle)
 
-        self.frame = tk.Frame(master=self.root, width=500, height=500, bg='lightblue')
+        self.frame = tk.Frame(master=self.root, bg='lightblue')
         self.frame.place(relx=0.5, rely=0.5, anchor=tk.CENTER)
 
-        for i in range(self.size):
-            for j in range(self.size):
-                value = self.puzzle[i][j]
-                entry = tk.Entry(master=self.frame, font=('Arial', 14), width=3, justify='center', borderwidth=2,
-                                 validate='key', validatecommand=validate_cmd, bg='white')
-                entry.grid(row=i * 2, column=j * 2, padx=5, pady=5, sticky='news')
-                entry.bind("<FocusIn>", self.on_focus_in)
-                entry.bind("<FocusOut>", self.on_focus_out)
-                entry.bind("<KeyRelease>", self.on_key_release)
-                if value != 0:
-                    entry.insert(0, str(value))
-                    entry.config(state='disabled', disabledbackground='lightgray')
-                self.entries[(i, j)] = entry
-
-        for ((row1, col1), (row2, col2)), sign in self.inequalities.items():
-            label_row = row1 * 2 if row1 == row2 else min(row1, row2) * 2 + 1
-            label_col = col1 * 2 + 1 if col1 != col2 else col1 * 2
-            tk.Label(master=self.frame, text=sign, font=('Arial', 14), bg="lightblue").grid(row=label_row, column=label_col)
-        for i in range(1, 2 * self.size - 1):
-            if i % 2 != 0:
-                tk.Label(master=self.frame, text=" ", bg="lightblue").grid(row=0, column=i)
-                tk.Label(master=self.frame, text=" ", bg="lightblue").grid(row=i, column=0)
+        cell_size = fit_cell_size(self.size, self.root.winfo_screenheight() * 0.6)
+        self.grid_canvas = GridCanvas(self.frame, self.size, self.puzzle, self.inequalities, cell_size,
+                                      on_change=self.on_cell_change, on_input=self.on_cell_input)
+        self.grid_canvas.pack(padx=5, pady=5)
+        self.grid_canvas.focus_set()
 
     def display_title(self):
         title_frame = tk.Frame(self.root, bg=self.root.cget('bg'))
@@ -190,36 +228,107 @@ class FutoshikiGame:
         size_label = tk.Label(title_frame, text=f"{self.size}x{self.size} Puzzle", font=("Arial", 18), bg=self.root.cget('bg'))
         size_label.pack()
 
-        if self.duel_mode:
+        if self.duel_mode or self.online is not None:
             player_label = tk.Label(title_frame, text=f"Player: {self.player}", font=("Arial", 18), bg=self.root.cget('bg'))
             player_label.pack()
 
-    def on_focus_in(self, event):
-        event.widget.config(highlightbackground="red", highlightcolor="red", highlightthickness=2)
-
-    def on_focus_out(self, event):
-        event.widget.config(highlightbackground="black", highlightcolor="black", highlightthickness=1)
+        # Anyone entering this code in Duel mode gets the same puzzle
+        if self.current.seed is not None:
+            code_label = tk.Label(title_frame, text=f"Code: {duel_code(self.size, self.difficulty, self.current.seed)}", font=("Arial", 12), bg=self.root.cget('bg'))
+            code_label.pack()
 
-    def on_key_release(self, event):
-        if event.keysym in ["BackSpace", "Return"]:
-            return
-        value = event.widget.get()
-        if value.isdigit() and 1 <= int(value) <= self.size:
+    def on_cell_input(self, valid):
+        if valid:
             self.play_valid_sound()
         else:
             self.play_invalid_sound()
 
+    def on_cell_change(self, row, col, value):
+        self.update_conflicts(row, col, value)
+        if self.online is not None:
+            # Only the latest count is kept; it goes out at most every 100 ms
+            self.online.send_progress(self.tracker.filled)
+        else:
+            self.autosave()
+
+    def update_conflicts(self, row, col, value):
+        for cell in self.tracker.set(row, col, value):
+            self.grid_canvas.set_conflict(*cell, self.tracker.is_conflicting(*cell))
+
+    def restore_entries(self, entries):
+        for row in range(self.size):
+            for col in range(self.size):
+                if entries[row][col] != self.original_puzzle[row][col]:
+                    self.grid_canvas.set_value(row, col, entries[row][col], notify=False)
+                    self.update_conflicts(row, col, entries[row][col])
+
+    def game_state(self):
+        mode = 'adventure' if self.adventure_mode else 'duel' if self.duel_mode else 'classic'
+        return GameState(self.current, [row[:] for row in self.tracker.values], time.time() - self.start_time, mode,
+                         self.hints_used, self.rating, self.player, self.player1_name, self.player2_name,
+                         self.player1_time, self.player2_time)
+
+    def autosave(self):
+        # Only takes a snapshot; the file is written later on the autosaver's thread
+        if self.timer_running and self.online is None:
+            self.saving = True
+            autosaver.submit(self.game_state())
+
+    def leave(self):
+        # Called by the router when this screen goes away, so the save has the time played up to now
+        if self.saving and self.loaded:
+            self.autosave()
+        if self.online is not None:
+            self.online.close()
+            self.online = None
+
+    def create_opponent_label(self):
+        self.opponent_label = tk.Label(self.root, text=f"{self.player2_name}: 0/{self.size * self.size}", font=('Arial', 14), bg=self.root.cget('bg'))
+        self.opponent_label.place(relx=0.9, rely=0.1, anchor=tk.CENTER)
+
+    def poll_online(self):
+        if self.online is None or not self.root.winfo_exists():
+            return
+        for event in self.online.poll():
+            if event['type'] == 'go':
+                # Shown from when the server's clock started, which times the race
+                self.start_time = time.time()
+            elif event['type'] == 'progress':
+                self.opponent_label.config(text=f"{self.player2_name}: {event['filled']}/{self.size * self.size}")
+            elif event['type'] == 'finished' and event['player'] != self.player_number:
+                self.remove_message(None)
+                self.show_message(f"{self.player2_name} has finished! Keep going.")
+            elif event['type'] == 'result':
+                self.show_online_result(event)
+                return
+            elif event['type'] in ('left', 'closed'):
+                # Play on alone
+                self.online.close()
+                self.online = None
+                self.remove_message(None)
+                self.show_message(f"{self.player2_name} has left the match." if event['type'] == 'left' else "Lost the connection to the match server.")
+                return
+        self.root.after(100, self.poll_online)
+
+    def show_online_result(self, event):
+        self.online.close()
+        self.online = None
+        times = [int(time_taken) for time_taken in event['times']]
+        # show_duel_congratulations names players 1 and 2; here they are this player and the opponent
+        self.player1_time, self.player2_time = times[self.player_number], times[1 - self.player_number]
+        self.show_duel_congratulations()
+
     def play_valid_sound(self):
-        self.valid_sound.play()
+        sounds.play('valid')
 
     def play_invalid_sound(self):
-        self.invalid_sound.play()
+        sounds.play('invalid')
 
     def play_button_click_sound(self):
-        self.button_click_sound.play()
+        sounds.play('click')
 
     def play_congrats_sound(self):
-        self.congrats_sound.play()
+        sounds.play('congrats')
 
     def create_buttons(self):
         frame = tk.Frame(self.root, bg=self.root.cget('bg'))
@@ -237,12 +346,15 @@ class FutoshikiGame:
         new_puzzle_button = tk.Button(self.root, text="New Puzzle", command=self.new_puzzle_button_click, bg='#FF5733', fg='white', font=('Arial', 14), padx=10, pady=5)
         new_puzzle_button.place(relx=0.75, rely=0.9,anchor=tk.CENTER, width=150, height=50)
 
+        hint_button = tk.Button(self.root, text="Hint", command=self.hint_button_click, bg='#FF5733', fg='white', font=('Arial', 14), padx=10, pady=5)
+        hint_button.place(relx=0.9, rely=0.9,anchor=tk.CENTER, width=150, height=50)
+
     def create_timer(self):
         self.timer_label = tk.Label(self.root, text="Time: 00:00", font=('Arial', 14), bg=self.root.cget('bg'))
         self.timer_label.place(relx=0.9, rely=0.05, anchor=tk.CENTER)
 
     def update_timer(self):
-        if self.timer_running:
+        if self.timer_running and self.root.winfo_exists():
             elapsed_time = int(time.time() - self.start_time)
             minutes = elapsed_time // 60
             seconds = elapsed_time % 60
@@ -266,6 +378,23 @@ class FutoshikiGame:
             else:
                 self.start_over()
 
+    def hint_button_click(self):
+        self.play_button_click_sound()
+        self.show_hint()
+
+    def show_hint(self):
+        with recorder.span("hint"):
+            hint = HintEngine(self.tracker, solution=self.board).next_hint()
+        self.remove_message(None)
+        if hint is None:
+            self.show_message("No hint available right now.")
+            return
+        self.hints_used += 1
+        self.autosave()
+        self.grid_canvas.move_cursor(*hint.cell)
+        self.grid_canvas.focus_set()
+        self.show_message(hint.explanation)
+
     def check_solution_button_click(self):
         self.play_button_click_sound()
         self.check_solution()
@@ -275,65 +404,41 @@ class FutoshikiGame:
         self.go_back()
 
     def go_back(self):
-        self.root.destroy()
-        home_root = tk.Tk()
-        HomePage(home_root)
-        home_root.state('zoomed')
-        home_root.mainloop()
+        self.router.show(HomePage, cache=True)
 
     def new_puzzle(self):
-        Playagain(self.root,self.size,self.difficulty)
+        Playagain(self.router,self.size,self.difficulty,self.rating)
 
     def start_over(self):
         self.puzzle = [row[:] for row in self.original_puzzle]
-        self.frame.destroy()
-        self.create_grid()
+        self.tracker = ConflictTracker(self.size, self.inequalities, self.puzzle)
+        self.grid_canvas.reset(self.puzzle)
         self.start_time = time.time()
+        if self.saving:
+            self.autosave()
 
     def start_adventure_from_beginning(self):
-        self.root.destroy()
-        adventure_root = tk.Tk()
-        FutoshikiGame(adventure_root, 3, 'easy', adventure_mode=True)
-        adventure_root.state('zoomed')
-        adventure_root.mainloop()
-
-    def validate_entry(self, P):
-        if P == "":
-            return True
-        if P.isdigit() and 1 <= int(P) <= self.size:
-            return True
-        return False
+        self.router.show(FutoshikiGame, 3, 'easy', adventure_mode=True)
 
     def check_solution(self):
         try:
-            board = [[0] * self.size for _ in range(self.size)]
-            for (row, col), entry in self.entries.items():
-                if entry.get():
-                    board[row][col] = int(entry.get())
-                else:
-                    raise ValueError("Puzzle is incomplete. Please fill all cells.")
-
-            for row in range(self.size):
-                if len(set(board[row])) != self.size or len(set(board[i][row] for i in range(self.size))) != self.size:
-                    raise ValueError("Duplicate in row or column")
-
-            for ((row1, col1), (row2, col2)), sign in self.inequalities.items():
-                if board[row1][col1] != 0 and board[row2][col2] != 0:
-                    if sign == '>' and not (board[row1][col1] > board[row2][col2]):
-                        raise ValueError(f"Inequality condition not met at {row1, col1} {sign} {row2, col2}")
-                    if sign == '<' and not (board[row1][col1] < board[row2][col2]):
-                        raise ValueError(f"Inequality condition not met at {row1, col1} {sign} {row2, col2}")
-                    if sign == 'v' and not (board[row1][col1] > board[row2][col2]):
-                        raise ValueError(f"Inequality condition not met at {row1, col1} {sign} {row2, col2}")
-                    if sign == 'ʌ' and not (board[row1][col1] < board[row2][col2]):
-                        raise ValueError(f"Inequality condition not met at {row1, col1} {sign} {row2, col2}")
+            with recorder.span("check_solution"):
+                self.tracker.check()
 
             end_time = time.time()
             elapsed_time = end_time - self.start_time
             self.timer_running = False
+            if self.saving:
+                autosaver.clear()
             minutes = int(elapsed_time // 60)
             seconds = int(elapsed_time % 60)
-            if self.adventure_mode and self.size < 10:
+            if not self.adventure_mode:
+                self.standing = self.record_solve('duel' if self.duel_mode or self.online is not None else 'classic', elapsed_time)
+            if self.online is not None:
+                self.online.solved()
+                self.remove_message(None)
+                self.show_message(f"Solved in {minutes:02}:{seconds:02}! Waiting for {self.player2_name}...")
+            elif self.adventure_mode and self.size < 10:
                 self.next_adventure_level()
             elif self.duel_mode:
                 self.handle_duel_completion(minutes, seconds)
@@ -344,63 +449,32 @@ class FutoshikiGame:
         except Exception as e:
             messagebox.showerror("Error", f"Invalid input. Please enter numbers only. ({str(e)})")
 
+    def record_solve(self, mode, seconds):
+        solve = Solve(self.player, self.size, self.difficulty, mode, seconds, self.hints_used, self.current.seed)
+        stats_store.record(solve)
+        return stats_store.standing(solve)
+
     def next_adventure_level(self):
         next_level = self.size + 1
         if next_level > 8:
             self.end_adventure_mode()
         else:
-            self.root.destroy()
-            next_level_root = tk.Tk()
-            FutoshikiGame(next_level_root, next_level, 'easy', adventure_mode=True, start_time=self.start_time)
-            next_level_root.state('zoomed')
-            next_level_root.mainloop()
+            self.router.show(FutoshikiGame, next_level, 'easy', adventure_mode=True, start_time=self.start_time)
 
     def end_adventure_mode(self):
         end_time = time.time()
         elapsed_time = end_time - self.start_time
         minutes = int(elapsed_time // 60)
         seconds = int(elapsed_time % 60)
-        self.root.destroy()
-        
-        congrats_root = tk.Tk()
-        congrats_root.title("Congratulations!")
-        congrats_root.state('zoomed')
-
-        self.root = tk.Tk()
-        self.root.withdraw()
-        # Add background image
-        try:
-            self.bg_image = Image.open("celeb.jpg")
-            self.bg_image = self.bg_image.resize((congrats_root.winfo_screenwidth(), congrats_root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
-            self.background_label = tk.Label(congrats_root, image=self.bg)
-            self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
-        except Exception as e:
-            print(f"Error loading image: {e}")
-
-        congrats_label = tk.Label(congrats_root, text="Congratulations!", font=("Arial", 24), bg='lightblue')
-        congrats_label.pack(pady=20)
-
-        time_label = tk.Label(congrats_root, text=f"You solved 3x3 to 8x8 puzzles in just {minutes:02}:{seconds:02}!", font=("Arial", 18), bg='lightblue')
-        time_label.pack(pady=10)
-
-        button_frame = tk.Frame(congrats_root, bg="lightblue")
-        button_frame.pack(pady=20)
-
-        home_button = tk.Button(button_frame, text="Home", font=('Arial', 14), command=lambda: self.go_home(congrats_root), bg='#FF5733', fg='white', padx=10, pady=5)
-        home_button.pack(side=tk.LEFT, padx=10)
-
-        exit_button = tk.Button(button_frame, text="Exit", font=('Arial', 14), command=lambda: self.exit_game(congrats_root), bg='#FF5733', fg='white', padx=10, pady=5)
-        exit_button.pack(side=tk.LEFT, padx=10)
+        # One entry for the whole run, 3x3 to 8x8
+        solve = Solve(self.player, self.size, self.difficulty, 'adventure', elapsed_time)
+        stats_store.record(solve)
+        self.router.show(AdventureCompleteWindow, minutes, seconds, stats_store.standing(solve))
 
     def handle_duel_completion(self, minutes, seconds):
         if self.player == self.player1_name:
             self.player1_time = minutes * 60 + seconds
-            self.root.destroy()
-            duel_root = tk.Tk()
-            PlayerSelectionWindow(duel_root, self.size, self.difficulty, self.player1_time, self.player1_name, self.player2_name)
-            duel_root.state('zoomed')
-            duel_root.mainloop()
+            self.router.show(PlayerSelectionWindow, self.size, self.difficulty, self.player1_time, self.player1_name, self.player2_name, seed=self.current.seed)
         elif self.player == self.player2_name:
             self.player2_time = minutes * 60 + seconds
             self.show_duel_congratulations()
@@ -418,9 +492,7 @@ class FutoshikiGame:
         
         # Add background image
         try:
-            self.bg_image = Image.open("celeb.jpg")
-            self.bg_image = self.bg_image.resize((congrats_root.winfo_screenwidth(), congrats_root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("celeb.jpg", congrats_root)
             self.background_label = tk.Label(congrats_root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -435,6 +507,10 @@ class FutoshikiGame:
         time_label = tk.Label(congrats_root, text=f"Winning time: {minutes:02}:{seconds:02}", font=("Arial", 18), bg='lightblue')
         time_label.pack(pady=10)
 
+        stats_label = tk.Label(congrats_root, text="", font=("Arial", 14), bg='lightblue')
+        stats_label.pack(pady=5)
+        show_standing(stats_label, self.standing, self.player)
+
         button_frame = tk.Frame(congrats_root, bg="lightblue")
         button_frame.pack(pady=20)
 
@@ -455,9 +531,7 @@ class FutoshikiGame:
         
         # Add background image
         try:
-            self.bg_image = Image.open("celeb.jpg")
-            self.bg_image = self.bg_image.resize((congrats_root.winfo_screenwidth(), congrats_root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("celeb.jpg", congrats_root)
             self.background_label = tk.Label(congrats_root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -469,6 +543,10 @@ class FutoshikiGame:
         time_label = tk.Label(congrats_root, text=f"You solved the puzzle in {minutes:02}:{seconds:02}.", font=("Arial", 18), bg='lightblue')
         time_label.pack(pady=10)
 
+        stats_label = tk.Label(congrats_root, text="", font=("Arial", 14), bg='lightblue')
+        stats_label.pack(pady=5)
+        show_standing(stats_label, self.standing)
+
         button_frame = tk.Frame(congrats_root, bg="lightblue")
         button_frame.pack(pady=20)
 
@@ -486,18 +564,14 @@ class FutoshikiGame:
         congrats_root.destroy()
         if self.adventure_mode:
             self.start_adventure_from_beginning()
-        elif self.duel_mode:
+        elif self.duel_mode or self.player_number is not None:
             self.restart_duel_mode()
         else:
             self.new_puzzle()
 
     def restart_duel_mode(self):
         self.play_button_click_sound()
-        self.root.destroy()
-        duel_root = tk.Tk()
-        DuelModeWindow(duel_root)
-        duel_root.state('zoomed')
-        duel_root.mainloop()
+        self.router.show(DuelModeWindow)
 
     def go_home(self, congrats_root):
         self.play_button_click_sound()
@@ -507,7 +581,7 @@ class FutoshikiGame:
     def exit_game(self, congrats_root):
         self.play_button_click_sound()
         congrats_root.destroy()
-        self.root.destroy()
+        self.router.quit()
 
     def show_message(self, message):
         # Create a character circle and message box
@@ -515,9 +589,7 @@ class FutoshikiGame:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png") 
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -527,37 +599,77 @@ class FutoshikiGame:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
+
+class AdventureCompleteWindow:
+    def __init__(self, router, minutes, seconds, standing=None):
+        self.router = router
+        self.root = router.new_screen("Congratulations!", 'lightblue')
+
+        # Add background image
+        try:
+            self.bg = assets.background("celeb.jpg", self.root)
+            self.background_label = tk.Label(self.root, image=self.bg)
+            self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
+        except Exception as e:
+            print(f"Error loading image: {e}")
+
+        congrats_label = tk.Label(self.root, text="Congratulations!", font=("Arial", 24), bg='lightblue')
+        congrats_label.pack(pady=20)
+
+        time_label = tk.Label(self.root, text=f"You solved 3x3 to 8x8 puzzles in just {minutes:02}:{seconds:02}!", font=("Arial", 18), bg='lightblue')
+        time_label.pack(pady=10)
+
+        if standing is not None:
+            stats_label = tk.Label(self.root, text="", font=("Arial", 14), bg='lightblue')
+            stats_label.pack(pady=5)
+            show_standing(stats_label, standing)
+
+        button_frame = tk.Frame(self.root, bg="lightblue")
+        button_frame.pack(pady=20)
+
+        home_button = tk.Button(button_frame, text="Home", font=('Arial', 14), command=self.go_home, bg='#FF5733', fg='white', padx=10, pady=5)
+        home_button.pack(side=tk.LEFT, padx=10)
+
+        exit_button = tk.Button(button_frame, text="Exit", font=('Arial', 14), command=self.exit_game, bg='#FF5733', fg='white', padx=10, pady=5)
+        exit_button.pack(side=tk.LEFT, padx=10)
+
+    def play_button_click_sound(self):
+        sounds.play('click')
+
+    def go_home(self):
+        self.play_button_click_sound()
+        self.router.show(HomePage, cache=True)
+
+    def exit_game(self):
+        self.play_button_click_sound()
+        self.router.quit()
 
 class Playagain:
-    def __init__(self,root,size,difficulty):
-        self.root = root
+    def __init__(self,router,size,difficulty,rating=None):
+        self.router = router
         self.size = size
         self.difficulty = difficulty
-        FutoshikiGame(self.root,self.size,self.difficulty )
+        self.rating = rating
+        self.router.show(FutoshikiGame,self.size,self.difficulty,rating=self.rating)
 
 class HomePage:
-    def __init__(self, root):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.configure(bg='sky blue')
+    def __init__(self, router):
+        self.router = router
+        self.root = router.new_screen("Welcome Page", 'sky blue')
 
         try:
-            self.bg_image = Image.open("image1.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("image1.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
             print(f"Error loading image: {e}")
 
-        self.root.title("Welcome Page")
-
         entry_message = tk.Label(self.root, text="Futoshiki Pro", font=("Stencil", 50), bg=self.root.cget('bg'))
         entry_message.place(relx=0.5, rely=0.3, anchor=tk.CENTER)
 
@@ -570,13 +682,17 @@ class HomePage:
         exit_button = tk.Button(self.root, text="Exit", bg="lightpink", font=("Arial", 20), command=self.exit_game)
         exit_button.place(relx=0.5, rely=0.7, anchor=tk.CENTER, width=200, height=50)
 
+        # Shown only while there is a saved game to go back to
+        self.resume_button = tk.Button(self.root, text="Resume", bg="lightpink", font=("Arial", 20), command=self.resume_button_click)
+        self.refresh()
+
         self.create_volume_button()
 
         # Display the initial message
         self.show_message("Welcome to Futoshiki! Click 'Start' to begin or 'Instructions' for help.")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
 
     def start_button_click(self):
         self.play_button_click_sound()
@@ -586,29 +702,43 @@ class HomePage:
         self.play_button_click_sound()
         self.inst()
 
+    def resume_button_click(self):
+        self.play_button_click_sound()
+        self.resume_game()
+
+    def refresh(self):
+        if autosaver.latest() is not None:
+            self.resume_button.place(relx=0.5, rely=0.4, anchor=tk.CENTER, width=200, height=50)
+        else:
+            self.resume_button.place_forget()
+
+    def resume_game(self):
+        state = autosaver.latest()
+        if state is None:
+            self.refresh()
+            return
+        self.router.show(FutoshikiGame, state.puzzle.size, state.puzzle.difficulty,
+                         adventure_mode=state.mode == 'adventure', duel_mode=state.mode == 'duel',
+                         player=state.player, player1_time=state.player1_time, player2_time=state.player2_time,
+                         start_time=time.time() - state.elapsed, player1_name=state.player1_name,
+                         player2_name=state.player2_name, rating=state.rating, saved=state)
+
     def exit_game(self):
         self.play_button_click_sound()
-        self.root.destroy()
+        self.router.quit()
 
     def inst(self):
-        self.root.destroy()
-        inst_root = tk.Tk()
-        InstructionsWindow(inst_root)
-        inst_root.state('zoomed')
-        inst_root.mainloop()
+        self.router.show(InstructionsWindow, cache=True)
 
     def open_mode_selection(self):
-        self.root.destroy()
-        mode_selection_root = tk.Tk()
-        ModeSelectionWindow(mode_selection_root)
-        mode_selection_root.state('zoomed')
-        mode_selection_root.mainloop()
+        self.router.show(ModeSelectionWindow, cache=True)
 
     def create_volume_button(self):
         self.volume_button = tk.Button(self.root, text="🔊", font=("Arial", 18), command=self.toggle_volume, bg="lightpink", borderwidth=0)
         self.volume_button.place(relx=0.95, rely=0.95, anchor=tk.CENTER)
 
     def toggle_volume(self):
+        import pygame
         if pygame.mixer.music.get_volume() > 0:
             pygame.mixer.music.set_volume(0)
             self.volume_button.config(text="🔈")
@@ -622,9 +752,7 @@ class HomePage:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  # Replace with the path to your character image
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -634,25 +762,20 @@ class HomePage:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
 
 class ModeSelectionWindow:
-    def __init__(self, root):
-        
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Select Mode")
-        self.root.configure(bg='lightblue')
+    def __init__(self, router):
+        self.router = router
+        self.root = router.new_screen("Select Mode", 'lightblue')
 
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -671,31 +794,19 @@ class ModeSelectionWindow:
         self.show_message("Select a game mode to start playing!")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
 
     def classic_mode(self):
         self.play_button_click_sound()
-        self.root.destroy()
-        classic_root = tk.Tk()
-        ClassicModeWindow(classic_root)
-        classic_root.state('zoomed')
-        classic_root.mainloop()
+        self.router.show(ClassicModeWindow, cache=True)
 
     def adventure_mode(self):
         self.play_button_click_sound()
-        self.root.destroy()
-        adventure_root = tk.Tk()
-        AdventureModeWindow(adventure_root)
-        adventure_root.state('zoomed')
-        adventure_root.mainloop()
+        self.router.show(AdventureModeWindow)
 
     def duel_mode(self):
         self.play_button_click_sound()
-        self.root.destroy()
-        duel_root = tk.Tk()
-        DuelModeWindow(duel_root)
-        duel_root.state('zoomed')
-        duel_root.mainloop()
+        self.router.show(DuelModeWindow)
 
     def show_message(self, message):
         # Create a character circle and message box
@@ -703,9 +814,7 @@ class ModeSelectionWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -715,24 +824,20 @@ class ModeSelectionWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
 
 class ClassicModeWindow:
-    def __init__(self, root):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Select Difficulty")
-        self.root.configure(bg='lightblue')
+    def __init__(self, router):
+        self.router = router
+        self.root = router.new_screen("Select Difficulty", 'lightblue')
 
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -750,15 +855,13 @@ class ClassicModeWindow:
         self.show_message("Select a difficulty level: Easy, Medium, or Hard.")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
 
     def select_difficulty(self, difficulty):
         self.play_button_click_sound()
-        self.root.destroy()
-        input_root = tk.Tk()
-        InputWindow(input_root, difficulty)
-        input_root.state('zoomed')
-        input_root.mainloop()
+        # Ask for puzzles whose solver rating matches the label, not just
+        # ones generated with that label's settings
+        self.router.show(InputWindow, difficulty, rated=True)
 
     def show_message(self, message):
         # Create a character circle and message box
@@ -766,9 +869,7 @@ class ClassicModeWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -778,24 +879,20 @@ class ClassicModeWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
 
 class AdventureModeWindow:
-    def __init__(self, root):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Adventure Mode")
-        self.root.configure(bg='lightblue')
+    def __init__(self, router):
+        self.router = router
+        self.root = router.new_screen("Adventure Mode", 'lightblue')
 
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -810,18 +907,16 @@ class AdventureModeWindow:
             level_button.grid(row=i//2, column=i%2, padx=10, pady=10)
             setattr(self, f"level_button_{i}", level_button)
         
+        puzzle_pool.prefetch(3, 'easy')
+
         # Display the initial message
         self.show_message("Complete each level to unlock the next. Start with the 3x3 puzzle!")
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
     def start_level(self, level):
         self.play_button_click_sound()
         size = int(level[0])
-        self.root.destroy()
-        puzzle_root = tk.Tk()
-        FutoshikiGame(puzzle_root, size, 'easy', adventure_mode=True)  # Start with easy difficulty for adventure
-        puzzle_root.state('zoomed')
-        puzzle_root.mainloop()
+        self.router.show(FutoshikiGame, size, 'easy', adventure_mode=True)  # Start with easy difficulty for adventure
 
     def enable_next_level(self, current_level):
         level_idx = int(current_level[0])
@@ -835,9 +930,7 @@ class AdventureModeWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -847,24 +940,20 @@ class AdventureModeWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
 
 class DuelModeWindow:
-    def __init__(self, root):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Dual Mode")
-        self.root.configure(bg='lightblue')
+    def __init__(self, router):
+        self.router = router
+        self.root = router.new_screen("Dual Mode", 'lightblue')
 
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -886,11 +975,14 @@ class DuelModeWindow:
         start_button = tk.Button(self.root, text="Start Dual", font=("Arial", 18), command=self.start_duel, bg='lightpink')
         start_button.pack(pady=20)
 
+        online_button = tk.Button(self.root, text="Online Dual", font=("Arial", 18), command=self.online_duel, bg='lightpink')
+        online_button.pack(pady=10)
+
         # Display the initial message
         self.show_message("Enter names for both players and click 'Start Dual' to begin!")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
 
     def start_duel(self):
         self.play_button_click_sound()
@@ -901,11 +993,11 @@ class DuelModeWindow:
             messagebox.showerror("Error", "Both player names are required.")
             return
 
-        self.root.destroy()
-        size_input_root = tk.Tk()
-        DuelSizeInputWindow(size_input_root, player1_name, player2_name)
-        size_input_root.state('zoomed')
-        size_input_root.mainloop()
+        self.router.show(DuelSizeInputWindow, player1_name, player2_name)
+
+    def online_duel(self):
+        self.play_button_click_sound()
+        self.router.show(OnlineDuelWindow, self.player1_entry.get())
 
     def show_message(self, message):
         # Create a character circle and message box
@@ -913,9 +1005,7 @@ class DuelModeWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  # Replace with the path to your character image
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -925,58 +1015,217 @@ class DuelModeWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
+
+class OnlineDuelWindow:
+    # Both players play the same seeded puzzle at the same time, each on their
+    # own computer, through a match server (python -m futoshiki.server.match).
+    # "Host" runs one inside this game for players on the same network.
+    def __init__(self, router, name=""):
+        self.router = router
+        self.root = router.new_screen("Online Dual", 'lightblue')
+        self.connection = None
+        self.joined = None
+
+        try:
+            self.bg = assets.background("instruct_bg.jpg", self.root)
+            self.background_label = tk.Label(self.root, image=self.bg)
+            self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
+        except Exception as e:
+            print(f"Error loading image: {e}")
+
+        title_label = tk.Label(self.root, text="Online Dual", font=("Arial", 24), bg='lightblue')
+        title_label.pack(pady=20)
+
+        self.name_entry = self.add_field("Your Name:", name)
+        self.server_entry = self.add_field("Server:", f"127.0.0.1:{DEFAULT_PORT}")
+        self.size_entry = self.add_field("Puzzle size (3-15), to create a match:", "6")
+        self.match_entry = self.add_field("Match id, to join one:", "")
+
+        button_frame = tk.Frame(self.root, bg='lightblue')
+        button_frame.pack(pady=20)
+        for text, command in (("Create", self.create_match), ("Join", self.join_match),
+                              ("Quick Match", self.quick_match), ("Host", self.host_server)):
+            button = tk.Button(button_frame, text=text, font=("Arial", 18), command=command, bg='lightpink')
+            button.pack(side=tk.LEFT, padx=10)
+
+        self.status_label = tk.Label(self.root, text="", font=("Arial", 18), bg='lightblue')
+        self.status_label.pack(pady=10)
+
+        # Display the initial message
+        self.show_message("Create a match and tell your opponent its id, or join theirs!")
+
+    def add_field(self, text, value):
+        label = tk.Label(self.root, text=text, font=("Arial", 18), bg='lightblue')
+        label.pack(pady=5)
+        entry = tk.Entry(self.root, font=("Arial", 18), justify='center')
+        entry.insert(0, value)
+        entry.pack(pady=5)
+        return entry
+
+    def play_button_click_sound(self):
+        sounds.play('click')
+
+    def connect(self):
+        if not self.name_entry.get():
+            raise ValueError("Your name is required.")
+        if self.connection is not None:
+            raise ValueError("Already waiting for a match.")
+        host, _, port = self.server_entry.get().rpartition(':')
+        try:
+            self.connection = ThreadedMatchClient(host or '127.0.0.1', int(port))
+        except OSError as e:
+            raise ValueError(f"Could not reach the match server: {e}")
+        self.poll()
+        return self.connection
+
+    def size(self):
+        size = int(self.size_entry.get())
+        if size < 3 or size > 15:
+            raise ValueError("Size must be between 3 and 15.")
+        return size
+
+    def create_match(self):
+        self.play_button_click_sound()
+        try:
+            size = self.size()
+            self.connect().create(self.name_entry.get(), size, 'easy')
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def join_match(self):
+        self.play_button_click_sound()
+        try:
+            if not self.match_entry.get().strip():
+                raise ValueError("Enter the match id your opponent was given.")
+            self.connect().join(self.name_entry.get(), self.match_entry.get().strip())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def quick_match(self):
+        self.play_button_click_sound()
+        try:
+            size = self.size()
+            self.connect().quick(self.name_entry.get(), size, 'easy')
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+
+    def host_server(self):
+        global match_server
+        self.play_button_click_sound()
+        if match_server is None:
+            try:
+                match_server = LocalMatchServer('0.0.0.0', DEFAULT_PORT)
+            except OSError as e:
+                messagebox.showerror("Error", f"Could not start a match server: {e}")
+                return
+        self.server_entry.delete(0, tk.END)
+        self.server_entry.insert(0, f"127.0.0.1:{match_server.port}")
+        self.status_label.config(text=f"Hosting on port {match_server.port}. Your opponent connects to this computer's address.")
+
+    def poll(self):
+        if self.connection is None or not self.root.winfo_exists():
+            return
+        for event in self.connection.poll():
+            if event['type'] == 'joined':
+                self.joined = event
+                self.status_label.config(text=f"Match id: {event['match']}. Waiting for an opponent...")
+            elif event['type'] == 'start':
+                joined = self.joined
+                me = joined['player']
+                connection, self.connection = self.connection, None
+                self.router.show(FutoshikiGame, joined['size'], joined['difficulty'], seed=joined['seed'], online=connection,
+                                 player=event['names'][me], player1_name=event['names'][me], player2_name=event['names'][1 - me],
+                                 player_number=me)
+                return
+            elif event['type'] in ('error', 'closed'):
+                self.connection.close()
+                self.connection = None
+                self.status_label.config(text=event.get('message', "Disconnected from the match server."))
+                return
+        self.root.after(100, self.poll)
+
+    def leave(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def show_message(self, message):
+        # Create a character circle and message box
+        self.message_frame = tk.Frame(self.root, bg="lightblue", bd=1, relief=tk.SOLID)
+        self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
+
+        try:
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
+            char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
+            char_label.pack(side=tk.LEFT, padx=5)
+        except Exception as e:
+            print(f"Error loading character image: {e}")
+
+        message_label = tk.Label(self.message_frame, text=message, font=("Arial", 16), bg="white", wraplength=500, justify=tk.LEFT)
+        message_label.pack(side=tk.RIGHT, padx=10, pady=5)
+
+        # Remove the message when the screen is clicked
+        self.router.root.bind("<Button-1>", self.remove_message)
+
+    def remove_message(self, event):
+        if hasattr(self, 'message_frame'):
+            self.message_frame.destroy()
+            self.router.root.unbind("<Button-1>")
 
 class DuelSizeInputWindow:
-    def __init__(self, root, player1_name, player2_name):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Futoshiki Dual - Select Size")
-        self.root.configure(bg='lightblue')
+    def __init__(self, router, player1_name, player2_name):
+        self.router = router
+        self.root = router.new_screen("Futoshiki Dual - Select Size", 'lightblue')
         self.player1_name = player1_name
         self.player2_name = player2_name
 
         # Add background image
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
             print(f"Error loading image: {e}")
 
-        self.label = tk.Label(self.root, text="Enter the size of the puzzle (3-8):", font=('Arial', 18), bg='lightblue')
+        self.label = tk.Label(self.root, text="Enter the size of the puzzle (3-15):", font=('Arial', 18), bg='lightblue')
         self.label.pack(pady=20)
 
         self.entry = tk.Entry(self.root, font=('Arial', 18), width=5, justify='center')
         self.entry.pack(pady=10)
 
+        self.code_label = tk.Label(self.root, text="Or enter a puzzle code to play a shared puzzle:", font=('Arial', 18), bg='lightblue')
+        self.code_label.pack(pady=(20, 0))
+
+        self.code_entry = tk.Entry(self.root, font=('Arial', 18), width=20, justify='center')
+        self.code_entry.pack(pady=10)
+
         self.submit_button = tk.Button(self.root, text="Submit", command=self.submit_size, bg='lightpink', font=('Arial', 18))
         self.submit_button.pack(pady=20)
 
         # Display the initial message
-        self.show_message("Enter the puzzle size (3-8) and click 'Submit' to start!")
+        self.show_message("Enter the puzzle size (3-15) and click 'Submit' to start!")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
 
     def submit_size(self):
         self.play_button_click_sound()
         try:
-            size = int(self.entry.get())
-            if size < 3 or size > 8:
-                raise ValueError("Size must be between 3 and 8.")
-            self.root.destroy()
-            player_selection_root = tk.Tk()
-            PlayerSelectionWindow(player_selection_root, size, 'easy', player1_name=self.player1_name, player2_name=self.player2_name)
-            player_selection_root.state('zoomed')
-            player_selection_root.mainloop()
+            if self.code_entry.get().strip():
+                size, difficulty, seed = parse_duel_code(self.code_entry.get())
+            else:
+                size = int(self.entry.get())
+                if size < 3 or size > 15:
+                    raise ValueError("Size must be between 3 and 15.")
+                difficulty, seed = 'easy', random_seed()
+            # Both players get the puzzle this seed makes
+            self.router.show(PlayerSelectionWindow, size, difficulty, player1_name=self.player1_name, player2_name=self.player2_name, seed=seed)
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
@@ -986,9 +1235,7 @@ class DuelSizeInputWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  # Replace with the path to your character image
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -998,30 +1245,27 @@ class DuelSizeInputWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
 
 class PlayerSelectionWindow:
-    def __init__(self, root, size, difficulty, player1_time=None, player1_name="", player2_name=""):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Futoshiki Duel - Select Player")
-        self.root.configure(bg='lightblue')
+    def __init__(self, router, size, difficulty, player1_time=None, player1_name="", player2_name="", seed=None):
+        self.router = router
+        self.root = router.new_screen("Futoshiki Duel - Select Player", 'lightblue')
         self.size = size
         self.difficulty = difficulty
         self.player1_time = player1_time
         self.player1_name = player1_name
         self.player2_name = player2_name
+        self.seed = seed
 
         # Add background image
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -1044,19 +1288,21 @@ class PlayerSelectionWindow:
             player2_button = tk.Button(self.root, text=f"{self.player2_name}", bg='lightgrey', font=('Arial', 18), state=tk.DISABLED)
             player2_button.pack(pady=10)
 
+        if self.seed is not None:
+            # Build the shared puzzle while names are being picked; the game then finds it cached
+            threading.Thread(target=puzzle_cache.get, args=(self.size, self.difficulty, self.seed), daemon=True).start()
+        else:
+            puzzle_pool.prefetch(self.size, self.difficulty)
+
         # Display the initial message
         self.show_message("Select a player to start their turn!")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
 
     def start_game(self, player):
         self.play_button_click_sound()
-        self.root.destroy()
-        puzzle_root = tk.Tk()
-        FutoshikiGame(puzzle_root, self.size, self.difficulty, duel_mode=True, player=player, player1_time=self.player1_time, player1_name=self.player1_name, player2_name=self.player2_name)
-        puzzle_root.state('zoomed')
-        puzzle_root.mainloop()
+        self.router.show(FutoshikiGame, self.size, self.difficulty, duel_mode=True, player=player, player1_time=self.player1_time, player1_name=self.player1_name, player2_name=self.player2_name, seed=self.seed)
 
     def show_message(self, message):
         # Create a character circle and message box
@@ -1064,9 +1310,7 @@ class PlayerSelectionWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  # Replace with the path to your character image
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -1076,25 +1320,21 @@ class PlayerSelectionWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
 
 class InstructionsWindow:
-    def __init__(self, root):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Instructions")
-        self.root.configure(bg="lightblue")
+    def __init__(self, router):
+        self.router = router
+        self.root = router.new_screen("Instructions", 'lightblue')
 
         # Add background image
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -1102,9 +1342,7 @@ class InstructionsWindow:
 
         # Add icon at the top
         try:
-            self.icon_image = Image.open("instruc.jpg")
-            self.icon_image = self.icon_image.resize((50, 50), Image.LANCZOS)
-            self.icon = ImageTk.PhotoImage(self.icon_image)
+            self.icon = assets.photo("instruc.jpg", (50, 50), self.root)
             self.icon_label = tk.Label(self.root, image=self.icon, bg='lightblue')
             self.icon_label.pack(pady=10)
         except Exception as e:
@@ -1139,13 +1377,9 @@ class InstructionsWindow:
         self.show_message("Follow the instructions to learn how to play Futoshiki!")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
     def open_mode_selection(self):
-        self.root.destroy()
-        mode_selection_root = tk.Tk()
-        ModeSelectionWindow(mode_selection_root)
-        mode_selection_root.state('zoomed')
-        mode_selection_root.mainloop()
+        self.router.show(ModeSelectionWindow, cache=True)
     def start_game_button_click(self):
         self.play_button_click_sound()
         self.start_game()
@@ -1155,18 +1389,10 @@ class InstructionsWindow:
         self.go_back()
 
     def start_game(self):
-        self.root.destroy()
-        input_root = tk.Tk()
-        InputWindow(input_root)
-        input_root.state('zoomed')
-        input_root.mainloop()
+        self.router.show(InputWindow)
 
     def go_back(self):
-        self.root.destroy()
-        home_root = tk.Tk()
-        HomePage(home_root)
-        home_root.state('zoomed')
-        home_root.mainloop()
+        self.router.show(HomePage, cache=True)
 
     def show_message(self, message):
         # Create a character circle and message box
@@ -1174,9 +1400,7 @@ class InstructionsWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -1186,26 +1410,24 @@ class InstructionsWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
+            self.router.root.unbind("<Button-1>")
 
 class InputWindow:
-    def __init__(self, root, difficulty='easy'):
-        self.root = root
-        self.root.state('zoomed')
-        self.root.title("Futoshiki Puzzle Size")
-        self.root.configure(bg='lightblue')
+    def __init__(self, router, difficulty='easy', rated=False):
+        self.router = router
+        self.root = router.new_screen("Futoshiki Puzzle Size", 'lightblue')
         self.difficulty = difficulty
+        # The rating band depends on the size, which is only known on submit
+        self.rated = rated
 
         # Add background image
         try:
-            self.bg_image = Image.open("instruct_bg.jpg")
-            self.bg_image = self.bg_image.resize((self.root.winfo_screenwidth(), self.root.winfo_screenheight()), Image.LANCZOS)
-            self.bg = ImageTk.PhotoImage(self.bg_image)
+            self.bg = assets.background("instruct_bg.jpg", self.root)
             self.background_label = tk.Label(self.root, image=self.bg)
             self.background_label.place(x=0, y=0, relwidth=1, relheight=1)
         except Exception as e:
@@ -1213,9 +1435,7 @@ class InputWindow:
 
         # Add icon at the top
         try:
-            self.icon_image = Image.open("instruc.jpg")
-            self.icon_image = self.icon_image.resize((100, 100), Image.LANCZOS)
-            self.icon = ImageTk.PhotoImage(self.icon_image)
+            self.icon = assets.photo("instruc.jpg", (100, 100), self.root)
             self.icon_label = tk.Label(self.root, image=self.icon, bg='lightblue')
             self.icon_label.pack(pady=10)
         except Exception as e:
@@ -1227,20 +1447,20 @@ class InputWindow:
         title_label = tk.Label(title_frame, text="FUTOSHIKI", font=("Arial", 24, "bold"), bg="lightblue")
         title_label.pack(side=tk.LEFT)
 
-        self.label = tk.Label(root, text="Enter the size of the puzzle (3-8):", font=('Arial', 14), bg='lightblue')
+        self.label = tk.Label(self.root, text="Enter the size of the puzzle (3-15):", font=('Arial', 14), bg='lightblue')
         self.label.pack(pady=10)
 
-        self.entry = tk.Entry(root, font=('Arial', 14), width=5, justify='center')
+        self.entry = tk.Entry(self.root, font=('Arial', 14), width=5, justify='center')
         self.entry.pack(pady=5)
 
-        self.submit_button = tk.Button(root, text="Submit", command=self.submit_button_click, bg='lightpink')
+        self.submit_button = tk.Button(self.root, text="Submit", command=self.submit_button_click, bg='lightpink')
         self.submit_button.pack(pady=10)
 
         # Display the initial message
-        self.show_message("Enter a puzzle size between 3 and 8 and click 'Submit'!")
+        self.show_message("Enter a puzzle size between 3 and 15 and click 'Submit'!")
 
     def play_button_click_sound(self):
-        pygame.mixer.Sound("button.wav").play()
+        sounds.play('click')
 
     def submit_button_click(self):
         self.play_button_click_sound()
@@ -1249,18 +1469,15 @@ class InputWindow:
     def submit_size(self):
         try:
             size = int(self.entry.get())
-            if size < 3 or size > 8:
-                raise ValueError("Size must be between 3 and 8.")
-            self.root.destroy()
+            if size < 3 or size > 15:
+                raise ValueError("Size must be between 3 and 15.")
             self.open_futoshiki_game(size)
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
     def open_futoshiki_game(self, size):
-        puzzle_root = tk.Tk()
-        puzzle_root.state('zoomed')
-        FutoshikiGame(puzzle_root, size, self.difficulty)
-        puzzle_root.mainloop()
+        rating = rating_band(size, self.difficulty) if self.rated else None
+        self.router.show(FutoshikiGame, size, self.difficulty, rating=rating)
 
     def show_message(self, message):
         # Create a character circle and message box
@@ -1268,9 +1485,7 @@ class InputWindow:
         self.message_frame.place(relx=0.02, rely=0.9, anchor=tk.SW)
 
         try:
-            char_image = Image.open("character.png")  
-            char_image = char_image.resize((125, 125), Image.LANCZOS)
-            self.char_photo = ImageTk.PhotoImage(char_image)
+            self.char_photo = assets.photo("character.png", (125, 125), self.root)
             char_label = tk.Label(self.message_frame, image=self.char_photo, bg="lightblue")
             char_label.pack(side=tk.LEFT, padx=5)
         except Exception as e:
@@ -1280,14 +1495,51 @@ class InputWindow:
         message_label.pack(side=tk.RIGHT, padx=10, pady=5)
 
         # Remove the message when the screen is clicked
-        self.root.bind("<Button-1>", self.remove_message)
+        self.router.root.bind("<Button-1>", self.remove_message)
 
     def remove_message(self, event):
         if hasattr(self, 'message_frame'):
             self.message_frame.destroy()
-            self.root.unbind("<Button-1>")
-
-root = tk.Tk()
-home_page = HomePage(root)
-root.state('zoomed')
-root.mainloop()
\ No newline at end of file
+            self.router.root.unbind("<Button-1>")
+
+def main():
+    parser = argparse.ArgumentParser(description="Futoshiki puzzle game.")
+    parser.add_argument('--instrument', action='store_true', help="record timings and show them in a corner overlay (F12)")
+    parser.add_argument('--profile', metavar='FILE', help="write cProfile stats of the Tk thread to FILE on exit")
+    parser.add_argument('--trace', metavar='FILE', help="write the recorded timings as Chrome trace JSON to FILE on exit")
+    args = parser.parse_args()
+    if args.instrument or args.trace:
+        recorder.enabled = True
+    if args.trace:
+        recorder.trace_at_exit(args.trace)
+    if args.profile:
+        recorder.start_profile(args.profile)
+
+    # pygame (and PIL, in ui.assets) load here rather than on import, so the
+    # module can be imported without an audio stack
+    import pygame
+
+    # Initialize Pygame mixer
+    pygame.mixer.init()
+
+    # Load and play background music
+    pygame.mixer.music.load("audio2.mp3")
+    pygame.mixer.music.play(-1)  # -1 means the music will loop indefinitely
+
+    # Decode every sound effect up front so clicks and keypresses never hit the disk
+    sounds.load()
+
+    root = tk.Tk()
+    root.state('zoomed')
+    router = Router(root)
+    router.show(HomePage, cache=True)
+    if recorder.enabled:
+        DebugOverlay(root, recorder)
+    # Closing the window goes through the router so the game in progress is saved
+    root.protocol("WM_DELETE_WINDOW", router.quit)
+    root.mainloop()
+    autosaver.stop()
+    stats_store.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
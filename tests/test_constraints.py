@@ -0,0 +1,9 @@
+from futoshiki.core import count_solutions
+from futoshiki.core.constraints import chain_domains
+
+
+def test_chain_longer_than_values_has_no_solutions():
+    # Five cells chained a < b < c < d < e cannot fit in the values 1-3
+    inequalities = {((0, 0), (0, 1)): '<', ((0, 1), (0, 2)): '<', ((0, 2), (1, 2)): '<', ((1, 2), (2, 2)): '<'}
+    assert 0 in chain_domains(3, inequalities)
+    assert count_solutions([[0] * 3 for _ in range(3)], inequalities) == 0
@@ -0,0 +1,14 @@
+import random
+
+from futoshiki.core import DIFFICULTY_SETTINGS, check_solution, count_solutions, new_puzzle
+
+
+def test_generated_puzzles_have_one_solution():
+    rng = random.Random(3)
+    for size in range(3, 13):
+        for difficulty in DIFFICULTY_SETTINGS:
+            puzzle = new_puzzle(size, difficulty, rng)
+            check_solution(puzzle.solution, puzzle.inequalities)
+            assert all(value in (0, puzzle.solution[row][col])
+                       for row, values in enumerate(puzzle.puzzle) for col, value in enumerate(values))
+            assert count_solutions(puzzle.puzzle, puzzle.inequalities) == 1, (size, difficulty)
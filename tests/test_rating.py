@@ -0,0 +1,18 @@
+from futoshiki.core import SCORE_MEDIANS, rate_puzzle, rating_bands
+from futoshiki.core import rating
+
+
+def test_bands_rise_with_difficulty_at_every_size():
+    for size, (easy, medium, hard) in SCORE_MEDIANS.items():
+        assert easy < medium < hard, size
+        bands = rating_bands(size)
+        assert bands['easy'][1] < bands['medium'][0] <= bands['medium'][1] < bands['hard'][0], size
+
+
+def test_search_is_cut_off_at_the_limit(monkeypatch):
+    # An empty grid without signs leaves every cell to search
+    empty = [[0] * 6 for _ in range(6)]
+    assert rate_puzzle(empty, {}).branches > 4
+    monkeypatch.setattr(rating, 'SEARCH_LIMIT', 4)
+    result = rate_puzzle(empty, {})
+    assert (result.hardest, result.branches) == ('search', 4)
@@ -0,0 +1,35 @@
+import random
+
+from futoshiki.core import new_puzzle, seeded_puzzle
+from futoshiki.core.savegame import MAX_TIME, GameState, decode_state, encode_state, load_state, save_state
+
+
+def test_game_round_trips_through_the_save_file(tmp_path):
+    puzzle = seeded_puzzle(6, 'medium', 12345)
+    entries = [row[:] for row in puzzle.puzzle]
+    entries[0] = puzzle.solution[0][:]
+    state = GameState(puzzle, entries, 83.25, mode='classic', hints_used=2, rating=(300, 700), player="Ana")
+    path = str(tmp_path / "save" / "game.bin")
+    save_state(state, path)
+    loaded = load_state(path)
+    assert (loaded.puzzle.size, loaded.puzzle.difficulty, loaded.puzzle.seed) == (6, 'medium', 12345)
+    assert loaded.puzzle.puzzle == puzzle.puzzle
+    assert loaded.puzzle.solution == puzzle.solution
+    assert loaded.puzzle.inequalities == puzzle.inequalities
+    assert loaded.puzzle.rating == puzzle.rating
+    assert loaded.entries == entries
+    assert (loaded.elapsed, loaded.mode, loaded.hints_used, loaded.rating) == (83.25, 'classic', 2, (300, 700))
+    assert (loaded.player, loaded.player1_time, loaded.player2_time) == ("Ana", None, None)
+
+
+def test_long_non_ascii_names_round_trip():
+    # 200 two-byte characters do not fit in 255 bytes; the cut must not split one
+    puzzle = new_puzzle(4, 'easy', random.Random(1))
+    state = GameState(puzzle, puzzle.puzzle, 12.5, mode='duel', player="ü" * 200,
+                      player1_name="名" * 100, player2_name="Zoë", player1_time=MAX_TIME + 1)
+    loaded = decode_state(encode_state(state))
+    assert loaded.player == "ü" * 127
+    assert loaded.player1_name == "名" * 85
+    assert loaded.player2_name == "Zoë"
+    assert loaded.player1_time == MAX_TIME
+    assert loaded.player2_time is None
@@ -0,0 +1,68 @@
+import functools
+import itertools
+import random
+
+from futoshiki.core import check_solution, count_solutions, generate_solved_board
+from futoshiki.core.constraints import adjacent_pairs
+
+
+@functools.lru_cache()
+def latin_squares(size):
+    # Every size x size Latin square (576 of them for 4x4), one row permutation at a time
+    def extend(rows):
+        if len(rows) == size:
+            yield [list(row) for row in rows]
+            return
+        for row in itertools.permutations(range(1, size + 1)):
+            if all(row[col] != other[col] for other in rows for col in range(size)):
+                yield from extend(rows + [row])
+    return list(extend([]))
+
+
+def brute_force_count(puzzle, inequalities):
+    count = 0
+    for board in latin_squares(len(puzzle)):
+        if any(puzzle[row][col] not in (0, board[row][col]) for row in range(len(board)) for col in range(len(board))):
+            continue
+        try:
+            check_solution(board, inequalities)
+        except ValueError:
+            continue
+        count += 1
+    return count
+
+
+def random_puzzle(size, rng):
+    # Givens and signs mostly taken from one solved board, with the odd
+    # random one thrown in so some puzzles have no solution at all
+    board = generate_solved_board(size, rng=rng)
+    puzzle = [[0] * size for _ in range(size)]
+    for row in range(size):
+        for col in range(size):
+            if rng.random() < 0.2:
+                puzzle[row][col] = board[row][col] if rng.random() < 0.8 else rng.randint(1, size)
+    inequalities = {}
+    for (row1, col1), (row2, col2) in adjacent_pairs(size):
+        if rng.random() < 0.3:
+            greater = board[row1][col1] > board[row2][col2]
+            if rng.random() < 0.1:
+                greater = not greater
+            if row1 == row2:
+                inequalities[(row1, col1), (row2, col2)] = '>' if greater else '<'
+            else:
+                inequalities[(row1, col1), (row2, col2)] = 'v' if greater else 'ʌ'
+    return puzzle, inequalities
+
+
+def test_count_solutions_matches_brute_force():
+    rng = random.Random(7)
+    counts = set()
+    for size in (3, 4):
+        for _ in range(60):
+            puzzle, inequalities = random_puzzle(size, rng)
+            expected = brute_force_count(puzzle, inequalities)
+            assert count_solutions(puzzle, inequalities, limit=1000) == expected
+            assert count_solutions(puzzle, inequalities) == min(expected, 2)
+            counts.add(min(expected, 2))
+    # The sample covers unsolvable, unique and ambiguous puzzles
+    assert counts == {0, 1, 2}